@@ -0,0 +1,93 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+
+
+class BatchSolver:
+    def __init__(self, resolver="dfs", transposition_table_capacity=None, count_cap=None, count_timeout=None):
+        self.resolver = resolver
+        self.transposition_table_capacity = transposition_table_capacity
+        # Solutions are counted, to flag ambiguous boards, when a cap or a timeout is given.
+        self.count_cap = count_cap
+        self.count_timeout = count_timeout
+
+    """
+    Expand directories (every *.txt file inside) and glob patterns into a sorted list of puzzle files.
+    """
+    @staticmethod
+    def collect(patterns):
+        file_names = set()
+        for pattern in patterns:
+            if os.path.isdir(pattern):
+                pattern = os.path.join(pattern, "*.txt")
+            file_names.update(glob.glob(pattern))
+        return sorted(file_names)
+
+    """
+    Solve a puzzle file and return its report: wall time, node counts and solution. A malformed puzzle file is
+    reported as unsolved with its error.
+    """
+    def solve(self, file_name):
+        start = time.perf_counter()
+        try:
+            course = main.Reader.read_file(file_name)
+        except ValueError as error:
+            return {"puzzle": file_name, "solved": False, "solution": None, "error": str(error)}
+        solver = main.Solver(course)
+        solver.find_paths(self.transposition_table_capacity)
+        solution = solver.resolve_paths(self.resolver)
+        wall_time = time.perf_counter() - start
+
+        is_solved = len(solution) == len(solver.balls)
+        report = {
+            "puzzle": file_name,
+            "wall_time": wall_time,
+            "path_finder_nodes": solver.n_path_finder_nodes,
+            "resolver_nodes": solver.n_resolver_nodes,
+            "solved": is_solved,
+            "solution": main.SolutionPrinter(solution).render().split("\n") if is_solved else None,
+        }
+        if self.count_cap is not None or self.count_timeout is not None:
+            counter = solver.count_solutions(self.count_cap, self.count_timeout)
+            report.update(solutions=counter.n_solutions, solutions_complete=counter.is_complete, status=counter.status)
+        return report
+
+    """
+    Solve every puzzle file, spreading them over a process pool when a number of workers is given. Reports are yielded
+    in file order.
+    """
+    def solve_all(self, file_names, n_workers=None):
+        if not n_workers:
+            yield from map(self.solve, file_names)
+            return
+
+        with ProcessPoolExecutor(n_workers) as executor:
+            yield from executor.map(self.solve, file_names, chunksize=max(1, len(file_names) // (n_workers * 16)))
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Solve a batch of puzzles and report JSON lines.")
+    argument_parser.add_argument("patterns", nargs="+", help="puzzle directories or glob patterns")
+    argument_parser.add_argument("--resolver", choices=main.RESOLVERS, default="dfs")
+    argument_parser.add_argument("--transposition-table", type=int, metavar="CAPACITY")
+    argument_parser.add_argument("--workers", type=int, metavar="N", help="solve puzzles over N processes")
+    argument_parser.add_argument("--output", help="JSON lines file (standard output by default)")
+    argument_parser.add_argument("--count-cap", type=int,
+                                 help="also count solutions up to COUNT_CAP (2 is enough to flag ambiguous boards)")
+    argument_parser.add_argument("--count-timeout", type=float, help="also count solutions for COUNT_TIMEOUT seconds")
+    args = argument_parser.parse_args()
+
+    batch_solver = BatchSolver(args.resolver, args.transposition_table, args.count_cap, args.count_timeout)
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for report in batch_solver.solve_all(batch_solver.collect(args.patterns), args.workers):
+            output.write(json.dumps(report) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
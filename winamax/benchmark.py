@@ -0,0 +1,58 @@
+import argparse
+import glob
+import os
+import time
+
+import main
+from generator import CourseGenerator
+
+
+class ResolverBenchmark:
+    def __init__(self, resolvers, repeat):
+        self.resolvers = resolvers
+        self.repeat = repeat
+
+    """
+    Enumerate the paths of a course once then time each resolver on it. Return the best time per resolver.
+    """
+    def run(self, course):
+        solver = main.Solver(course)
+        solver.find_paths()
+
+        timings, solutions = {}, {}
+        for resolver in self.resolvers:
+            best_time = None
+            for k in range(self.repeat):
+                start = time.perf_counter()
+                solution = solver.resolve_paths(resolver)
+                elapsed = time.perf_counter() - start
+                best_time = elapsed if best_time is None else min(best_time, elapsed)
+            timings[resolver] = best_time
+            solutions[resolver] = len(solution) == len(solver.balls)
+        return timings, solutions
+
+    @staticmethod
+    def report(name, timings, solutions):
+        columns = ["{}={:.6f}s{}".format(resolver, timing, "" if solutions[resolver] else " (unsolved)")
+                   for resolver, timing in timings.items()]
+        print("{:<24} {}".format(name, "  ".join(columns)))
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Compare path resolvers on fixtures and generated courses.")
+    argument_parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(__file__), "in*.txt"))
+    argument_parser.add_argument("--resolvers", nargs="+", choices=main.RESOLVERS, default=list(main.RESOLVERS))
+    argument_parser.add_argument("--sizes", nargs="+", type=int, default=[16, 24, 32])
+    argument_parser.add_argument("--max-hits", type=int, default=4)
+    argument_parser.add_argument("--seed", type=int, default=0)
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    args = argument_parser.parse_args()
+
+    benchmark = ResolverBenchmark(args.resolvers, args.repeat)
+    for file_name in sorted(glob.glob(args.fixtures)):
+        benchmark.report(os.path.basename(file_name), *benchmark.run(main.Reader.read_file(file_name)))
+
+    for size in args.sizes:
+        n_balls = size * size // 12
+        matrix = CourseGenerator(size, size, n_balls, args.max_hits, obstacle_density=0.1, seed=args.seed).generate()
+        benchmark.report("generated {}x{}".format(size, size), *benchmark.run(main.Course.from_matrix(matrix)))
@@ -0,0 +1,94 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import main
+from generator import CourseGenerator
+
+
+class BenchmarkSuite:
+    def __init__(self, sizes, ball_density, max_hits, obstacle_density, distractor_density, seeds, resolver,
+                 measure_memory=True):
+        self.sizes = sizes
+        # Number of balls per cell of the course.
+        self.ball_density = ball_density
+        self.max_hits = max_hits
+        self.obstacle_density = obstacle_density
+        self.distractor_density = distractor_density
+        self.seeds = seeds
+        self.resolver = resolver
+        self.measure_memory = measure_memory
+
+    def solve(self, course):
+        solver = main.Solver(course)
+        start = time.perf_counter()
+        solver.find_paths()
+        find_time = time.perf_counter() - start
+        start = time.perf_counter()
+        solution = solver.resolve_paths(self.resolver)
+        resolve_time = time.perf_counter() - start
+        return solver, solution, find_time, resolve_time
+
+    """
+    Solve a course and return its record. Peak memory is measured on a second, traced run so that tracing doesn't
+    inflate the timings.
+    """
+    def run(self, size, seed):
+        n_balls = max(1, int(size * size * self.ball_density))
+        matrix = CourseGenerator(size, size, n_balls, self.max_hits, self.obstacle_density, seed,
+                                 distractor_density=self.distractor_density).generate()
+        course = main.Course.from_matrix(matrix)
+        solver, solution, find_time, resolve_time = self.solve(course)
+
+        peak_memory = None
+        if self.measure_memory:
+            tracemalloc.start()
+            self.solve(course)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        return {
+            "size": size,
+            "seed": seed,
+            "balls": len(solver.balls),
+            "paths": sum(len(ball.paths) for ball in solver.balls),
+            "find_time": find_time,
+            "resolve_time": resolve_time,
+            "solve_time": find_time + resolve_time,
+            "peak_memory": peak_memory,
+            "path_finder_nodes": solver.n_path_finder_nodes,
+            "resolver_nodes": solver.n_resolver_nodes,
+            "solved": len(solution) == len(solver.balls),
+        }
+
+    def run_all(self):
+        for size in self.sizes:
+            for seed in self.seeds:
+                yield self.run(size, seed)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Record solve time and peak memory across course sizes.")
+    argument_parser.add_argument("--sizes", nargs="+", type=int, default=[8, 16, 32, 64, 100])
+    argument_parser.add_argument("--ball-density", type=float, default=0.05)
+    argument_parser.add_argument("--max-hits", type=int, default=4)
+    argument_parser.add_argument("--obstacle-density", type=float, default=0.1)
+    argument_parser.add_argument("--distractor-density", type=float, default=0.1)
+    argument_parser.add_argument("--seeds", nargs="+", type=int, default=[0, 1, 2])
+    argument_parser.add_argument("--resolver", choices=main.RESOLVERS, default="dfs")
+    argument_parser.add_argument("--no-memory", action="store_true", help="skip the traced peak memory run")
+    argument_parser.add_argument("--output", help="JSON lines file to append records to (standard output by default)")
+    args = argument_parser.parse_args()
+
+    suite = BenchmarkSuite(args.sizes, args.ball_density, args.max_hits, args.obstacle_density,
+                           args.distractor_density, args.seeds, args.resolver, not args.no_memory)
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for record in suite.run_all():
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -0,0 +1,121 @@
+import argparse
+import hashlib
+import sqlite3
+import sys
+import time
+
+import main
+
+
+class SolutionCache:
+    # Arrow symbols swapped by each elementary transformation of the course.
+    TRANSPOSED_SYMBOLS = bytes.maketrans(b"^v<>", b"<>^v")
+    FLIPPED_ROWS_SYMBOLS = bytes.maketrans(b"^v", b"v^")
+    FLIPPED_COLUMNS_SYMBOLS = bytes.maketrans(b"<>", b"><")
+    # The 8 rotations and reflections, as (transposed, flipped rows, flipped columns) applied in this order.
+    SYMMETRIES = [(transposed, flipped_rows, flipped_columns)
+                  for transposed in (False, True) for flipped_rows in (False, True) for flipped_columns in (False, True)]
+
+    def __init__(self, file_name, resolver="dfs"):
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, solution BLOB NOT NULL)")
+        self.resolver = resolver
+        self.n_hits = 0
+        self.n_misses = 0
+
+    """
+    Apply a symmetry to a grid given as a list of byte rows. Arrow symbols are turned along with the grid.
+    """
+    @staticmethod
+    def transform(rows, symmetry):
+        transposed, flipped_rows, flipped_columns = symmetry
+        if transposed:
+            rows = [bytes(column).translate(SolutionCache.TRANSPOSED_SYMBOLS) for column in zip(*rows)]
+        if flipped_rows:
+            rows = [row.translate(SolutionCache.FLIPPED_ROWS_SYMBOLS) for row in reversed(rows)]
+        if flipped_columns:
+            rows = [row[::-1].translate(SolutionCache.FLIPPED_COLUMNS_SYMBOLS) for row in rows]
+        return rows
+
+    """
+    Undo a symmetry: each elementary transformation is its own inverse, so they are applied in the reverse order.
+    """
+    @staticmethod
+    def untransform(rows, symmetry):
+        transposed, flipped_rows, flipped_columns = symmetry
+        rows = SolutionCache.transform(rows, (False, False, flipped_columns))
+        rows = SolutionCache.transform(rows, (False, flipped_rows, False))
+        return SolutionCache.transform(rows, (transposed, False, False))
+
+    """
+    Return the key of the course, the same for its 8 rotations and reflections, and the symmetry turning the course
+    into the canonical orientation the key is computed from.
+    """
+    @staticmethod
+    def canonicalize(course):
+        width, data = course.width, bytes(course.data)
+        rows = [data[k:k + width] for k in range(0, len(data), width)]
+        canonical_grid, canonical_symmetry = min((b"\n".join(SolutionCache.transform(rows, symmetry)), symmetry)
+                                                 for symmetry in SolutionCache.SYMMETRIES)
+        return hashlib.sha256(canonical_grid).hexdigest(), canonical_symmetry
+
+    """
+    Return the cached solution rows of the course in its own orientation, or None if it was never solved.
+    """
+    def get(self, course):
+        key, symmetry = self.canonicalize(course)
+        record = self.connection.execute("SELECT solution FROM solutions WHERE key = ?", (key,)).fetchone()
+        if record is None:
+            return None
+        return [row.decode() for row in self.untransform(record[0].split(b"\n"), symmetry)]
+
+    """
+    Store the solution rows of the course in the canonical orientation.
+    """
+    def put(self, course, solution_rows):
+        key, symmetry = self.canonicalize(course)
+        solution = b"\n".join(self.transform([row.encode() for row in solution_rows], symmetry))
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (key, solution))
+
+    """
+    Return the solution rows of the course, from the cache or else from the solver. Unsolvable courses return None and
+    are not cached.
+    """
+    def solve(self, course):
+        solution_rows = self.get(course)
+        if solution_rows is not None:
+            self.n_hits += 1
+            return solution_rows
+
+        self.n_misses += 1
+        solver = main.Solver(course)
+        solver.find_paths()
+        solution = solver.resolve_paths(self.resolver)
+        if len(solution) != len(solver.balls):
+            return None
+        solution_rows = main.SolutionPrinter(solution).render().split("\n")
+        self.put(course, solution_rows)
+        return solution_rows
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description="Solve courses through an on-disk cache shared by their rotations and reflections.")
+    argument_parser.add_argument("courses", nargs="*", help="course files (standard input by default)")
+    argument_parser.add_argument("--cache", default="solutions.sqlite3", help="SQLite cache file")
+    argument_parser.add_argument("--resolver", choices=main.RESOLVERS, default="dfs")
+    args = argument_parser.parse_args()
+
+    cache = SolutionCache(args.cache, args.resolver)
+    start = time.perf_counter()
+    courses = map(main.Reader.read_file, args.courses) if args.courses else [main.Reader.read_input()]
+    for course in courses:
+        solution_rows = cache.solve(course)
+        print("\n".join(solution_rows) if solution_rows is not None else "no solution")
+    cache.close()
+    print("{} hits, {} misses in {:.6f}s".format(cache.n_hits, cache.n_misses, time.perf_counter() - start),
+          file=sys.stderr)
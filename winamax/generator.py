@@ -0,0 +1,119 @@
+import argparse
+import random
+
+from main import Directions, EmptyField, Hole, Obstacle
+
+
+class CourseGenerator:
+    def __init__(self, width, height, n_balls, max_hits=5, obstacle_density=0.0, seed=None, min_hits=1,
+                 distractor_density=0.0):
+        # Hit counts are written as a single digit on the course.
+        if not 1 <= min_hits <= max_hits <= 9:
+            raise ValueError("hit counts must satisfy 1 <= min_hits <= max_hits <= 9, got {} and {}".format(
+                min_hits, max_hits))
+        self.width = width
+        self.height = height
+        self.n_balls = n_balls
+        self.min_hits = min_hits
+        self.max_hits = max_hits
+        # Share of the cells turned into obstacles before planting paths.
+        self.obstacle_density = obstacle_density
+        # Share of the cells left free or flown over by planted paths turned into obstacles after planting them.
+        self.distractor_density = distractor_density
+        self.random = random.Random(seed)
+
+    """
+    Plant a random path for a ball starting with a given number of hits. Return the list of shots, each one being the
+    list of run over cells (the last one being the landing cell), or an empty list if the ball got stuck before its
+    first hit.
+    """
+    def plant_path(self, matrix, used, i, j, n_hits):
+        shots = []
+        n_shots = self.random.randint(1, n_hits)
+        for n_remaining_hits in range(n_hits, n_hits - n_shots, -1):
+            directions = list(Directions)
+            self.random.shuffle(directions)
+            for direction in directions:
+                shot_cells = [(i + direction.value[0] * k, j + direction.value[1] * k) for k in range(1, n_remaining_hits + 1)]
+                final_i, final_j = shot_cells[-1]
+                if (0 <= final_i < self.height and 0 <= final_j < self.width and
+                        matrix[final_i][final_j] != Obstacle.SYMBOL and
+                        not used.intersection(shot_cells)):
+                    break
+            else:
+                # Stuck: stop here if the ball did at least one shot.
+                break
+            used.update(shot_cells)
+            shots.append(shot_cells)
+            i, j = shot_cells[-1]
+        return shots
+
+    """
+    Return a solvable course as a matrix of symbols: every ball has a planted path to its own hole and no two
+    planted paths cross. Distractor obstacles are then added on free cells and on cells the planted paths only fly
+    over, which keeps the planted paths valid. Raise a ValueError if the course has no room for all the balls.
+    """
+    def generate(self):
+        matrix = [[EmptyField.SYMBOL] * self.width for i in range(self.height)]
+        cells = [(i, j) for i in range(self.height) for j in range(self.width)]
+        for i, j in cells:
+            if self.random.random() < self.obstacle_density:
+                matrix[i][j] = Obstacle.SYMBOL
+
+        used, landing_cells = set(), set()
+        free_cells = [(i, j) for i, j in cells if matrix[i][j] == EmptyField.SYMBOL]
+        self.random.shuffle(free_cells)
+
+        n_planted = 0
+        for i, j in free_cells:
+            if n_planted == self.n_balls:
+                break
+            if (i, j) in used:
+                continue
+            n_hits = self.random.randint(self.min_hits, self.max_hits)
+            used.add((i, j))
+            shots = self.plant_path(matrix, used, i, j, n_hits)
+            if not shots:
+                used.discard((i, j))
+                continue
+            matrix[i][j] = str(n_hits)
+            landing_cells.update(shot_cells[-1] for shot_cells in shots)
+            hole_i, hole_j = shots[-1][-1]
+            matrix[hole_i][hole_j] = Hole.SYMBOL
+            n_planted += 1
+
+        if n_planted < self.n_balls:
+            raise ValueError("only {} of {} balls could be planted on a {}x{} course".format(
+                n_planted, self.n_balls, self.width, self.height))
+
+        for i, j in cells:
+            if matrix[i][j] == EmptyField.SYMBOL and (i, j) not in landing_cells:
+                if self.random.random() < self.distractor_density:
+                    matrix[i][j] = Obstacle.SYMBOL
+
+        return matrix
+
+    @staticmethod
+    def format(matrix):
+        return "{} {}\n".format(len(matrix[0]), len(matrix)) + "\n".join("".join(row) for row in matrix)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Print a random solvable course.")
+    argument_parser.add_argument("width", type=int)
+    argument_parser.add_argument("height", type=int)
+    argument_parser.add_argument("balls", type=int)
+    argument_parser.add_argument("--min-hits", type=int, default=1)
+    argument_parser.add_argument("--max-hits", type=int, default=5)
+    argument_parser.add_argument("--obstacle-density", type=float, default=0.0)
+    argument_parser.add_argument("--distractor-density", type=float, default=0.0)
+    argument_parser.add_argument("--seed", type=int)
+    args = argument_parser.parse_args()
+
+    try:
+        generator = CourseGenerator(args.width, args.height, args.balls, args.max_hits, args.obstacle_density, args.seed,
+                                    args.min_hits, args.distractor_density)
+        matrix = generator.generate()
+    except ValueError as error:
+        argument_parser.error(str(error))
+    print(generator.format(matrix))
@@ -1,5 +1,18 @@
+import argparse
+import cProfile
+import sys
+import time
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from enum import Enum
-from copy import deepcopy
+from multiprocessing import Event
+
+try:
+    import numpy
+except ImportError:
+    # Rendering falls back to bytearrays.
+    numpy = None
 
 
 class Directions(Enum):
@@ -18,8 +31,26 @@ class Directions(Enum):
         else:
             return ">"
 
+    @property
+    def code(self):
+        return DIRECTION_CODES[self]
+
+
+DIRECTIONS = list(Directions)
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+DIRECTION_SYMBOLS = {direction: ord(str(direction)) for direction in DIRECTIONS}
+
+
+class CellTypes:
+    EMPTY = 0
+    OBSTACLE = 1
+    HOLE = 2
+    BALL = 3
+
 
 class Item:
+    __slots__ = ("i_init", "j_init", "i", "j")
+
     def __init__(self, i, j):
         self.i_init = i
         self.j_init = j
@@ -28,32 +59,22 @@ class Item:
 
 
 class Ball(Item):
+    __slots__ = ("n_remaining_hits", "packed_moves", "paths", "undo_stack", "visited_mask")
+
     def __init__(self, i, j, n_remaining_hits):
         super().__init__(i, j)
         self.n_remaining_hits = n_remaining_hits
-        self.past_moves = []
+        # Past moves packed as cell * 4 + direction code integers.
+        self.packed_moves = array("I")
         self.paths = []
-
-    @property
-    def previous_positions(self):
-        current_position = (self.i, self.j)
-        crossed_positions = set((move.i, move.j) for move in self.past_moves) if self.past_moves else set()
-        return crossed_positions.union({current_position})
+        self.undo_stack = []
+        # Bitmask of the cells crossed or reached by past hits (the initial position is already excluded as a ball cell).
+        self.visited_mask = 0
 
     @property
     def is_on_hole(self):
-        is_on_holes = [self.i == hole.i and self.j == hole.j for hole in HOLES]
-        return any(is_on_holes), is_on_holes.index(True) if any(is_on_holes) else None
-
-    """
-    Return the list of future moves if the ball was hit in a given direction.
-    """
-    def compute_future_moves(self, direction):
-        future_moves = []
-        for k in range(self.n_remaining_hits):
-            future_move = Move(self.i + direction.value[0] * k, self.j + direction.value[1] * k, direction)
-            future_moves.append(future_move)
-        return future_moves
+        cell = self.i * COURSE.width + self.j
+        return COURSE.cells[cell] == CellTypes.HOLE, COURSE.hole_indexes.get(cell)
 
     """
     Return True if the ball is hittable in a given direction.
@@ -66,205 +87,2216 @@ class Ball(Item):
       (6) It doesn't run over a hole.
     """
     def is_hittable(self, direction):
-        future_moves = self.compute_future_moves(direction)
+        return not self.rejected_condition(direction)
 
-        # Future positions are future move positions skipping the first one and adding the final position.
-        future_positions = set((future_move.i, future_move.j) for future_move in future_moves[1:])
-        final_position = (self.i + direction.value[0] * self.n_remaining_hits, self.j + direction.value[1] * self.n_remaining_hits)
-        future_positions.add(final_position)
+    """
+    Return the number of the first condition of is_hittable the ball fails in a given direction, or 0 if it is
+    hittable.
+    """
+    def rejected_condition(self, direction):
+        n_remaining_hits = self.n_remaining_hits
 
         # Condition (1)
-        has_remaining_hits = bool(self.n_remaining_hits)
+        if not n_remaining_hits:
+            return 1
 
         # Condition (2)
-        ends_on_course = 0 <= final_position[0] < COURSE.height and 0 <= final_position[1] < COURSE.width
+        final_i = self.i + direction.value[0] * n_remaining_hits
+        final_j = self.j + direction.value[1] * n_remaining_hits
+        if not (0 <= final_i < COURSE.height and 0 <= final_j < COURSE.width):
+            return 2
 
         # Condition (3)
-        ends_on_no_obstacle = all(final_position[0] != obstacle.i or final_position[1] != obstacle.j for obstacle in OBSTACLES)
+        cells = COURSE.cells
+        if cells[final_i * COURSE.width + final_j] == CellTypes.OBSTACLE:
+            return 3
 
-        # Condition (4)
-        does_not_cross_nor_end_on_self_path = not self.previous_positions.intersection(future_positions)
+        # Future positions are the cells run over after the current one, the last one being the final position.
+        step = direction.value[0] * COURSE.width + direction.value[1]
+        cell = self.i * COURSE.width + self.j
+        visited_mask = self.visited_mask
+        for k in range(1, n_remaining_hits + 1):
+            cell += step
 
-        # Condition (5)
-        does_not_cross_nor_end_on_ball = not future_positions.intersection(set((ball.i_init, ball.j_init) for ball in balls))
+            # Condition (4)
+            if visited_mask >> cell & 1:
+                return 4
 
-        # Condition (6)
-        does_not_cross_hole = not (future_positions - {final_position}).intersection(set((hole.i, hole.j) for hole in HOLES))
+            # Condition (5)
+            if cells[cell] == CellTypes.BALL:
+                return 5
 
-        _is_hittable = (has_remaining_hits and
-                        ends_on_course and
-                        ends_on_no_obstacle and
-                        does_not_cross_nor_end_on_self_path and
-                        does_not_cross_nor_end_on_ball and
-                        does_not_cross_hole)
+            # Condition (6)
+            if cells[cell] == CellTypes.HOLE and k < n_remaining_hits:
+                return 6
 
-        return _is_hittable
+        return 0
 
+    """
+    Hit the ball in place in a given direction. The state before the hit is pushed on the undo stack.
+    """
     def hit(self, direction):
-        self.past_moves += self.compute_future_moves(direction)
-        self.i = self.i + direction.value[0] * self.n_remaining_hits
-        self.j = self.j + direction.value[1] * self.n_remaining_hits
+        n_remaining_hits = self.n_remaining_hits
+        self.undo_stack.append((self.i, self.j, n_remaining_hits, len(self.packed_moves), self.visited_mask))
+        step = direction.value[0] * COURSE.width + direction.value[1]
+        cell = self.i * COURSE.width + self.j
+        direction_code = direction.code
+        self.packed_moves.extend((cell + step * k) * 4 + direction_code for k in range(n_remaining_hits))
+        self.i = self.i + direction.value[0] * n_remaining_hits
+        self.j = self.j + direction.value[1] * n_remaining_hits
         self.n_remaining_hits -= 1
+        for k in range(1, n_remaining_hits + 1):
+            self.visited_mask |= 1 << (cell + step * k)
+
+    """
+    Revert the last hit: restore position, remaining hits and visited cells, and truncate past moves.
+    """
+    def undo(self):
+        i, j, n_remaining_hits, n_past_moves, visited_mask = self.undo_stack.pop()
+        self.i, self.j, self.n_remaining_hits, self.visited_mask = i, j, n_remaining_hits, visited_mask
+        del self.packed_moves[n_past_moves:]
 
 
 class Obstacle(Item):
+    __slots__ = ()
     SYMBOL = "X"
 
 
 class Hole(Item):
+    __slots__ = ()
     SYMBOL = "H"
 
 
 class Move:
+    __slots__ = ("i", "j", "direction")
+
     def __init__(self, i, j, direction):
         self.i = i
         self.j = j
         self.direction = direction
 
+    """
+    Return the moves of integers packed as cell * 4 + direction code.
+    """
+    @staticmethod
+    def unpack(packed_moves):
+        moves = []
+        for packed_move in packed_moves:
+            cell, direction_code = divmod(packed_move, 4)
+            i, j = divmod(cell, COURSE.width)
+            moves.append(Move(i, j, DIRECTIONS[direction_code]))
+        return moves
+
 
 class EmptyField(Item):
+    __slots__ = ()
     SYMBOL = "."
 
 
 class Reader:
     @staticmethod
     def read_input():
-        height = int(input().split()[1])
-        matrix = []
-        for i in range(height):
-            row = list(input())
-            matrix.append(row)
-        return matrix
+        return Reader.read_bytes(sys.stdin.buffer.read())
+
+    @staticmethod
+    def read_file(file_name):
+        with open(file_name, "rb") as file:
+            return Reader.read_bytes(file.read())
+
+    """
+    Return the course held in a single byte array of symbols with a stride of the course width. Raise a ValueError if
+    the header isn't a width and a height or if the rows don't match them.
+    """
+    @staticmethod
+    def read_bytes(data):
+        lines = data.split(b"\n")
+        try:
+            width, height = map(int, lines[0].split())
+        except ValueError:
+            raise ValueError("course header must be a width and a height, got {!r}".format(lines[0][:80])) from None
+        rows = [row.rstrip(b"\r") for row in lines[1:height + 1]]
+        if len(rows) < height:
+            raise ValueError("course has {} rows, expected {}".format(len(rows), height))
+        for i, row in enumerate(rows):
+            if len(row) != width:
+                raise ValueError("course row {} has {} symbols, expected {}".format(i, len(row), width))
+        return Course(bytearray(b"".join(rows)), width, height)
 
 
 class Parser:
+    # Translation table from symbol bytes to cell types.
+    CELL_TYPES = bytes(CellTypes.OBSTACLE if chr(code) == Obstacle.SYMBOL else
+                       CellTypes.HOLE if chr(code) == Hole.SYMBOL else
+                       CellTypes.BALL if chr(code).isdigit() else
+                       CellTypes.EMPTY for code in range(256))
+
     @staticmethod
-    def parse(matrix):
-        course = Course(matrix)
+    def parse(course):
+        course.cells = course.data.translate(Parser.CELL_TYPES)
+        course.hole_indexes = {}
         holes, obstacles, balls = [], [], []
-        for i, row in enumerate(course.matrix):
-            for j, symbol in enumerate(row):
-                if symbol == EmptyField.SYMBOL:
-                    pass
-                elif symbol == Obstacle.SYMBOL:
-                    obstacles.append(Obstacle(i, j))
-                elif symbol == Hole.SYMBOL:
-                    holes.append(Hole(i, j))
-                else:
-                    balls.append(Ball(i, j, int(symbol)))
+        for cell in Parser.find_cells(course.cells, CellTypes.OBSTACLE):
+            obstacles.append(Obstacle(*divmod(cell, course.width)))
+        for cell in Parser.find_cells(course.cells, CellTypes.HOLE):
+            course.hole_indexes[cell] = len(holes)
+            holes.append(Hole(*divmod(cell, course.width)))
+        for cell in Parser.find_cells(course.cells, CellTypes.BALL):
+            balls.append(Ball(*divmod(cell, course.width), int(chr(course.data[cell]))))
         return course, holes, obstacles, balls
 
+    """
+    Return the indexes of the cells of a given type, in row-major order.
+    """
+    @staticmethod
+    def find_cells(cells, cell_type):
+        cell = cells.find(cell_type)
+        while cell != -1:
+            yield cell
+            cell = cells.find(cell_type, cell + 1)
+
 
 class Course:
-    def __init__(self, matrix):
-        self.matrix = matrix
+    def __init__(self, data, width, height):
+        # Symbols of the course, row after row.
+        self.data = data
+        self.width = width
+        self.height = height
+        # Flat row-major lookup tables of static cell types and hole indexes, filled by the parser.
+        self.cells = None
+        self.hole_indexes = None
 
-    @property
-    def height(self):
-        return len(self.matrix)
+    @staticmethod
+    def from_matrix(matrix):
+        return Course(bytearray("".join("".join(row) for row in matrix).encode()), len(matrix[0]), len(matrix))
 
-    @property
-    def width(self):
-        return len(self.matrix[0])
+    """
+    Return a copy of the course symbols only, cheap to send to another process.
+    """
+    def copy(self):
+        return Course(self.data, self.width, self.height)
+
+    """
+    Return the symbols of a flat row-major buffer as a string, one line per row. With NumPy, the newlines are added as
+    one more column in a single copy.
+    """
+    @staticmethod
+    def join_rows(symbols, width, height):
+        if numpy is None:
+            return b"\n".join(symbols[k:k + width] for k in range(0, width * height, width)).decode()
+
+        rows = numpy.empty((height, width + 1), numpy.uint8)
+        rows[:, :width] = numpy.frombuffer(symbols, numpy.uint8).reshape(height, width)
+        rows[:, width] = ord("\n")
+        return rows.tobytes()[:-1].decode()
 
     def __str__(self):
-        return "\n".join(["".join(row) for row in self.matrix])
+        return Course.join_rows(self.data, self.width, self.height)
 
 
 class Path:
-    def __init__(self, start, end, to_hole, hole_index, moves):
+    __slots__ = ("start", "end", "packed_moves", "to_hole", "hole_index", "mask", "equivalents")
+
+    def __init__(self, start, end, to_hole, hole_index, packed_moves, mask):
         self.start = start
         self.end = end
-        self.moves = moves
+        # Moves packed as cell * 4 + direction code integers, only unpacked on demand.
+        self.packed_moves = packed_moves
         self.to_hole = to_hole
         self.hole_index = hole_index
+        # Bitmask of the cells run over or reached by the path (row-major index into the course).
+        self.mask = mask
+        # Paths of the same ball with the same cells and hole, only differing by their arrows.
+        self.equivalents = []
 
     """
     Return True if two paths do not cross. As a consequence, it checks that two paths don't reach the same hole.
     """
     def does_not_cross(self, other_path):
-        self_final_position = (self.end[0], self.end[1])
-        self_crossed_positions = set((move.i, move.j) for move in self.moves) if self.moves else set()
-        self_previous_positions = self_crossed_positions.union({self_final_position})
+        return not self.mask & other_path.mask
+
+    @property
+    def moves(self):
+        return Move.unpack(self.packed_moves)
 
-        other_path_final_position = (other_path.end[0], other_path.end[1])
-        other_path_crossed_positions = set((move.i, move.j) for move in other_path.moves) if other_path.moves else set()
-        other_path_previous_positions = other_path_crossed_positions.union({other_path_final_position})
+    """
+    Return a compact picklable encoding of the path: hole index and moves packed as cell * 4 + direction code integers.
+    The cells mask, as wide as the course, is left out and rebuilt by decode.
+    """
+    def encode(self):
+        return self.hole_index, self.packed_moves.tobytes()
 
-        return not self_previous_positions.intersection(other_path_previous_positions)
+    @staticmethod
+    def decode(start, encoded_path):
+        hole_index, encoded_moves = encoded_path
+        hole = HOLES[hole_index]
+        packed_moves = array("I", encoded_moves)
+        # The moves start from every cell run over by the path, only the hole has to be added.
+        mask = Path.cells_mask([packed_move >> 2 for packed_move in packed_moves] + [hole.i * COURSE.width + hole.j])
+        return Path(start, (hole.i, hole.j), True, hole_index, packed_moves, mask)
+
+    """
+    Return the bitmask of the given cells (row-major indexes into the course), set byte per byte.
+    """
+    @staticmethod
+    def cells_mask(cells):
+        mask_bytes = bytearray((COURSE.width * COURSE.height + 7) >> 3)
+        for cell in cells:
+            mask_bytes[cell >> 3] |= 1 << (cell & 7)
+        return int.from_bytes(mask_bytes, "little")
+
+    """
+    Return the row-major indexes of the cells run over or reached by the path.
+    """
+    @property
+    def cells(self):
+        cells = []
+        mask = self.mask
+        while mask:
+            lowest_bit = mask & -mask
+            cells.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return cells
+
+
+class ReachabilityOracle:
+    # Translation table from the binary digits of a mask to bytes of a flat table.
+    BITS = bytes.maketrans(b"01", b"\x00\x01")
+
+    def __init__(self, course, max_hits):
+        self.course = course
+        self.max_hits = max_hits
+        # Flat row-major tables indexed by the number of remaining hits.
+        self.reachable = []
+
+    """
+    Return the bitmask of the cells of a given type (row-major index into the course).
+    """
+    @staticmethod
+    def type_mask(cells, cell_type):
+        digits = bytes(ord("1") if code == cell_type else ord("0") for code in range(256))
+        return int(cells.translate(digits)[::-1], 2)
+
+    """
+    Compute backward from the holes, for every cell and number of remaining hits, whether a hole is still reachable.
+    Only the static rules are applied: a ball path crossing itself is ignored. Cell sets are bitmasks, so that the
+    shots of every cell in a direction are checked at once by shifting the mask of their landing cells.
+    The build stops early, leaving the upper levels out, once the deadline is reached.
+    """
+    def build(self, deadline=None):
+        cells, width, height = self.course.cells, self.course.width, self.course.height
+        n_cells = width * height
+        course_mask = (1 << n_cells) - 1
+        # First cell of every row, to repeat a row pattern over the course.
+        first_columns = course_mask // ((1 << width) - 1)
+        holes = self.type_mask(cells, CellTypes.HOLE)
+        balls = self.type_mask(cells, CellTypes.BALL)
+        obstacles = self.type_mask(cells, CellTypes.OBSTACLE)
+        run_over = course_mask & ~(balls | holes)
+
+        # Return the mask of the cells whose k-th next cell in a direction is in the course and in a given mask.
+        def shift(mask, direction, k):
+            step = (direction.value[0] * width + direction.value[1]) * k
+            shifted_mask = mask >> step if step >= 0 else (mask << -step) & course_mask
+            if direction.value[1] > 0:
+                shifted_mask &= ((1 << max(width - k, 0)) - 1) * first_columns
+            elif direction.value[1] < 0:
+                shifted_mask &= (((1 << width) - 1) ^ ((1 << min(k, width)) - 1)) * first_columns
+            return shifted_mask
+
+        # Per direction, the cells whose shot runs over n_remaining_hits - 1 cells without a ball nor a hole.
+        clear_runs = [course_mask] * len(DIRECTIONS)
+        reachable_masks = [holes]
+        for n_remaining_hits in range(1, self.max_hits + 1):
+            if deadline is not None and deadline.has_passed():
+                break
+            landings = reachable_masks[-1] & ~balls
+            reachable = holes
+            for direction_code, direction in enumerate(DIRECTIONS):
+                if n_remaining_hits > 1:
+                    clear_runs[direction_code] &= shift(run_over, direction, n_remaining_hits - 1)
+                reachable |= shift(landings, direction, n_remaining_hits) & clear_runs[direction_code] & ~obstacles
+            reachable_masks.append(reachable)
+
+        self.reachable = [bytearray(format(mask, "0{}b".format(n_cells))[::-1].encode()).translate(self.BITS)
+                          for mask in reachable_masks]
+        return self
+
+    """
+    Return an oracle over tables built elsewhere, e.g. by the parent of a worker process.
+    """
+    @staticmethod
+    def from_tables(course, reachable):
+        oracle = ReachabilityOracle(course, len(reachable) - 1)
+        oracle.reachable = reachable
+        return oracle
+
+    def is_reachable(self, cell, n_remaining_hits):
+        return self.reachable[n_remaining_hits][cell]
+
+
+class TranspositionTable:
+    def __init__(self, capacity):
+        # States are keyed by their visited cells and the shots of a ball get strictly shorter, so two paths practically
+        # never meet in the same state: no fixture nor generated course hits the table, it only adds the lookups.
+        # Capacity is the maximum number of stored path suffixes (an entry without suffix counts as one).
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        suffixes = self.entries.get(key)
+        if suffixes is not None:
+            self.entries.move_to_end(key)
+        return suffixes
+
+    """
+    Store the path suffixes reachable from a state, evicting the least recently used entries beyond capacity.
+    """
+    def put(self, key, suffixes):
+        self.entries[key] = suffixes
+        self.size += max(1, len(suffixes))
+        while self.size > self.capacity and self.entries:
+            evicted_key, evicted_suffixes = self.entries.popitem(last=False)
+            self.size -= max(1, len(evicted_suffixes))
+
+
+class Deadline:
+    # Number of calls to is_expired between two reads of the clock.
+    CHECK_INTERVAL = 256
+
+    def __init__(self, timeout):
+        self.end = time.monotonic() + timeout
+        self.n_unchecked_calls = 0
+        self.is_reached = False
+
+    """
+    Return True once the deadline is reached. The clock is only read every CHECK_INTERVAL calls, so that cheap
+    searches such as the path enumeration can check it at every node.
+    """
+    def is_expired(self):
+        if self.is_reached:
+            return True
+        self.n_unchecked_calls += 1
+        if self.n_unchecked_calls < self.CHECK_INTERVAL:
+            return False
+        return self.has_passed()
+
+    """
+    Return True once the deadline is reached, reading the clock right away. Meant for the checks between phases and
+    at every node of costly searches.
+    """
+    def has_passed(self):
+        self.n_unchecked_calls = 0
+        self.is_reached = self.is_reached or time.monotonic() >= self.end
+        return self.is_reached
 
 
 class PathFinder:
-    def __init__(self, ball):
+    # Whether the search goes through Ball.is_hittable, whose rejections are counted in the statistics.
+    counts_rejections = True
+
+    def __init__(self, ball, transposition_table=None, oracle=None, stats=None, deadline=None, max_depth=None):
         self.ball = ball
+        self.transposition_table = transposition_table
+        self.oracle = oracle
+        # The search stops once the deadline is reached, and paths are limited to max_depth hits when given.
+        self.deadline = deadline
+        self.max_depth = max_depth
+        self.is_complete = True
+        self.n_nodes = 0
+        # Rejections are only counted when statistics are collected, to keep the plain search free of it.
+        self.rejected_condition = ball.rejected_condition if stats is None else stats.count_rejections(ball.rejected_condition)
+
+    """
+    Return False if the reachability oracle proves no hole can be reached after hitting the ball in a given direction.
+    """
+    def can_reach_hole(self, direction):
+        if self.oracle is None:
+            return True
+        n_remaining_hits = self.ball.n_remaining_hits
+        final_i = self.ball.i + direction.value[0] * n_remaining_hits
+        final_j = self.ball.j + direction.value[1] * n_remaining_hits
+        return self.oracle.is_reachable(final_i * COURSE.width + final_j, n_remaining_hits - 1)
 
     """
     Compute allowed paths to holes for a given ball using a DFS algorithm.
     """
     def find_paths(self, paths):
+        if self.transposition_table is not None:
+            return self.find_memoized_paths(paths)
+
+        paths.extend(self.iter_paths())
+        return paths
+
+    """
+    Generate allowed paths to holes for a given ball one at a time using an iterative DFS algorithm. The explicit
+    stack holds the index of the next direction to try at each depth and is preallocated to the number of hits.
+    """
+    def iter_paths(self):
+        ball, rejected_condition, can_reach_hole = self.ball, self.rejected_condition, self.can_reach_hole
+        is_expired = self.deadline.is_expired if self.deadline is not None else None
+        max_depth = self.max_depth
+        self.n_nodes += 1
         # Success: Ball did reach a hole.
-        if self.ball.is_on_hole[0]:
-            path = Path((self.ball.i_init, self.ball.j_init), (self.ball.i, self.ball.j), self.ball.is_on_hole[0], self.ball.is_on_hole[1], self.ball.past_moves)
-            paths.append(path)
-            return paths
-
-        for direction in Directions:
-            if self.ball.is_hittable(direction):
-                ball = deepcopy(self.ball)
-                self.ball.hit(direction)
-                paths = self.find_paths(paths)
-                self.ball = ball
-
-        # Failure: Ball didn't reach any hole and is not hittable hence back-track.
+        if ball.is_on_hole[0]:
+            yield self.current_path()
+            return
+
+        next_directions = [0] * (ball.n_remaining_hits + 1)
+        depth = 0
+        while depth >= 0:
+            # Abort: Time is up, the ball is put back to its initial state.
+            if is_expired is not None and is_expired():
+                self.is_complete = False
+                for k in range(depth):
+                    ball.undo()
+                return
+
+            direction_index = next_directions[depth]
+
+            # Failure: Ball didn't reach any hole and is not hittable anymore hence back-track.
+            if direction_index == len(DIRECTIONS):
+                depth -= 1
+                if depth >= 0:
+                    ball.undo()
+                continue
+
+            next_directions[depth] = direction_index + 1
+            direction = DIRECTIONS[direction_index]
+            if not rejected_condition(direction) and can_reach_hole(direction):
+                ball.hit(direction)
+                self.n_nodes += 1
+                # Success: Ball did reach a hole.
+                if ball.is_on_hole[0]:
+                    yield self.current_path()
+                    ball.undo()
+                # Failure: Ball reached the maximum depth without reaching any hole.
+                elif depth + 1 == max_depth:
+                    ball.undo()
+                else:
+                    depth += 1
+                    next_directions[depth] = 0
+
+    """
+    Return the path followed by the ball so far.
+    """
+    def current_path(self):
+        mask = 1 << (self.ball.i_init * COURSE.width + self.ball.j_init) | self.ball.visited_mask
+        return Path((self.ball.i_init, self.ball.j_init), (self.ball.i, self.ball.j), self.ball.is_on_hole[0], self.ball.is_on_hole[1], array("I", self.ball.packed_moves), mask)
+
+    """
+    Compute allowed paths to holes for a given ball from the memoized path suffixes of its initial state.
+    """
+    def find_memoized_paths(self, paths):
+        start = (self.ball.i_init, self.ball.j_init)
+        start_mask = 1 << (self.ball.i_init * COURSE.width + self.ball.j_init)
+        for moves, mask, end, hole_index in self.find_suffixes():
+            paths.append(Path(start, end, True, hole_index, moves, start_mask | mask))
+        return paths
+
+    """
+    Return the path suffixes (moves, cells mask, end, hole index) reachable from the current ball state using an
+    iterative DFS algorithm. Suffixes are memoized by (position, remaining hits, visited cells) since they only depend
+    on them. The explicit stack holds one frame (key, suffixes, index of the next direction, moves and mask of the
+    last shot) per shot, the suffixes of a state being prefixed with the shot leading to it once they are all found.
+    """
+    def find_suffixes(self):
+        ball, rejected_condition, can_reach_hole = self.ball, self.rejected_condition, self.can_reach_hole
+        self.n_nodes += 1
+        # Success: Ball did reach a hole.
+        is_on_hole, hole_index = ball.is_on_hole
+        if is_on_hole:
+            return [(array("I"), 0, (ball.i, ball.j), hole_index)]
+
+        key = (ball.i, ball.j, ball.n_remaining_hits, ball.visited_mask)
+        suffixes = self.transposition_table.get(key)
+        if suffixes is not None:
+            return suffixes
+
+        frames = [None] * (ball.n_remaining_hits + 1)
+        frames[0] = [key, [], 0, None, 0]
+        depth = 0
+        # Suffixes of the state reached by the last shot of the current frame, once they are all found.
+        shot_suffixes = None
+        while True:
+            frame = frames[depth]
+            key, suffixes, direction_index, shot_moves, shot_mask = frame
+            if shot_suffixes is not None:
+                for moves, mask, end, hole_index in shot_suffixes:
+                    suffixes.append((shot_moves + moves, shot_mask | mask, end, hole_index))
+                shot_suffixes = None
+                ball.undo()
+
+            # Every direction has been tried: the suffixes of the state are complete.
+            if direction_index == len(DIRECTIONS):
+                self.transposition_table.put(key, suffixes)
+                if not depth:
+                    return suffixes
+                shot_suffixes = suffixes
+                depth -= 1
+                continue
+
+            frame[2] = direction_index + 1
+            direction = DIRECTIONS[direction_index]
+            if rejected_condition(direction) or not can_reach_hole(direction):
+                continue
+
+            n_past_moves, visited_mask = len(ball.packed_moves), ball.visited_mask
+            ball.hit(direction)
+            self.n_nodes += 1
+            frame[3] = ball.packed_moves[n_past_moves:]
+            frame[4] = ball.visited_mask ^ visited_mask
+            # Success: Ball did reach a hole.
+            is_on_hole, hole_index = ball.is_on_hole
+            if is_on_hole:
+                shot_suffixes = [(array("I"), 0, (ball.i, ball.j), hole_index)]
+                continue
+
+            key = (ball.i, ball.j, ball.n_remaining_hits, ball.visited_mask)
+            shot_suffixes = self.transposition_table.get(key)
+            if shot_suffixes is None:
+                depth += 1
+                frames[depth] = [key, [], 0, None, 0]
+
+
+class BackwardPathFinder:
+    # Costs of a static prefix for the forward search, of a static suffix for the backward search and of a shot for the
+    # backward build, fitted to the search times of the balls of generated courses.
+    PREFIX_COST = 6
+    SUFFIX_COST = 3
+    SHOT_COST = 1
+    # The walks are built from the static rules only, without going through Ball.is_hittable.
+    counts_rejections = False
+
+    def __init__(self, ball, oracle=None):
+        self.ball = ball
+        self.oracle = oracle
+        # Per number of remaining hits, the shots from each cell as (landing, direction code) tuples, and the number of
+        # static walks from each cell to a hole. Only the states met by both the forward frontier of the ball and the backward
+        # frontier of the holes are kept.
+        self.successors = []
+        self.suffix_counts = []
+        # Per number of remaining hits, the hole cells ending paths and the shots leading to each cell, as (departure,
+        # packed moves, mask of the cells run over or reached) tuples.
+        self.holes = []
+        self.predecessors = []
+        # Estimated cost of the forward search and of the backward build and search.
+        self.forward_cost = 0
+        self.backward_cost = 0
+        self.n_nodes = 0
+
+    """
+    Compute the states (cell, remaining hits) reachable forward from the ball start that can still reach a hole, with
+    the static rules only, pruning the forward frontier with the reachability oracle when given. Then estimate the cost
+    of each search by counting, for every state, the static walks from the start to it (forward prefixes) and from it
+    to a hole (backward suffixes), the backward search also paying for the shots of its build. The exploration itself
+    is left out of the estimate since both directions have paid for it once it runs.
+    """
+    def explore(self):
+        cells, width, height = COURSE.cells, COURSE.width, COURSE.height
+        n_hits = self.ball.n_remaining_hits
+        start = self.ball.i_init * width + self.ball.j_init
+        reachable = self.oracle.reachable if self.oracle is not None else None
+
+        # Forward frontier: shots from every cell reachable from the start, by number of remaining hits. The shots of a
+        # level are described once as (direction code, row shift, column shift, cell step) tuples.
+        self.successors = [{} for n_remaining_hits in range(n_hits + 1)]
+        vectors = [(direction_code, direction.value[0], direction.value[1]) for direction_code, direction in enumerate(DIRECTIONS)]
+        frontier = {start}
+        for n_remaining_hits in range(n_hits, 0, -1):
+            next_frontier = set()
+            landing_reachable = reachable[n_remaining_hits - 1] if reachable is not None else None
+            shifts = [(direction_code, di * n_remaining_hits, dj * n_remaining_hits, di * width + dj)
+                      for direction_code, di, dj in vectors]
+            for cell in frontier:
+                if cells[cell] == CellTypes.HOLE:
+                    continue
+                i, j = divmod(cell, width)
+                shots = []
+                for direction_code, i_shift, j_shift, step in shifts:
+                    if not (0 <= i + i_shift < height and 0 <= j + j_shift < width):
+                        continue
+                    landing = cell + step * n_remaining_hits
+                    if cells[landing] == CellTypes.OBSTACLE or cells[landing] == CellTypes.BALL:
+                        continue
+                    if landing_reachable is not None and not landing_reachable[landing]:
+                        continue
+                    run_over_types = cells[cell + step:landing:step]
+                    if CellTypes.BALL in run_over_types or CellTypes.HOLE in run_over_types:
+                        continue
+                    shots.append((landing, direction_code))
+                    next_frontier.add(landing)
+                self.successors[n_remaining_hits][cell] = shots
+            frontier = next_frontier
+
+        # Backward frontier: keep the states reaching a hole, counting the suffixes from each of them. Holes are
+        # path ends whatever the remaining hits.
+        self.suffix_counts = [{} for n_remaining_hits in range(n_hits + 1)]
+        self.holes = [[] for n_remaining_hits in range(n_hits + 1)]
+        n_shots = 0
+        for n_remaining_hits in range(1, n_hits + 1):
+            landing_suffix_counts = self.suffix_counts[n_remaining_hits - 1]
+            for shots in self.successors[n_remaining_hits].values():
+                for landing, direction_code in shots:
+                    if cells[landing] == CellTypes.HOLE and landing not in landing_suffix_counts:
+                        landing_suffix_counts[landing] = 1
+                        self.holes[n_remaining_hits - 1].append(landing)
+            for cell, shots in self.successors[n_remaining_hits].items():
+                suffix_count = 0
+                for landing, direction_code in shots:
+                    if landing in landing_suffix_counts:
+                        suffix_count += landing_suffix_counts[landing]
+                        n_shots += 1
+                if suffix_count:
+                    self.suffix_counts[n_remaining_hits][cell] = suffix_count
+
+        # Prefixes are counted from the start over the met states only.
+        prefix_counts = {start: 1} if start in self.suffix_counts[n_hits] else {}
+        n_prefixes = n_suffixes = 0
+        for n_remaining_hits in range(n_hits, -1, -1):
+            next_prefix_counts = {}
+            for cell, prefix_count in prefix_counts.items():
+                n_prefixes += prefix_count
+                n_suffixes += self.suffix_counts[n_remaining_hits][cell]
+                for landing, direction_code in self.successors[n_remaining_hits].get(cell, ()):
+                    if n_remaining_hits and landing in self.suffix_counts[n_remaining_hits - 1]:
+                        next_prefix_counts[landing] = next_prefix_counts.get(landing, 0) + prefix_count
+            prefix_counts = next_prefix_counts
+        self.forward_cost = self.PREFIX_COST * n_prefixes
+        self.backward_cost = self.SHOT_COST * n_shots + self.SUFFIX_COST * n_suffixes
+        return self
+
+    """
+    Compute the shots leading to every met state, with their packed moves and the mask of the cells they run over or
+    reach. Masks are local to the box of the cells the ball can reach, so that they stay small on large courses, and a
+    shot mask is a run of cells every step apart, shifted from a pattern shared by the shots of the same length.
+    """
+    def build(self):
+        if not self.successors:
+            self.explore()
+        width, height = COURSE.width, COURSE.height
+        n_hits = len(self.successors) - 1
+        reach = n_hits * (n_hits + 1) // 2
+        top, left = max(self.ball.i_init - reach, 0), max(self.ball.j_init - reach, 0)
+        box_width = min(self.ball.j_init + reach + 1, width) - left
+        vectors = [(direction.value[0], direction.value[1]) for direction in DIRECTIONS]
+        patterns = {}
+        self.predecessors = [{} for n_remaining_hits in range(n_hits + 1)]
+        for n_remaining_hits in range(1, n_hits + 1):
+            landing_suffix_counts = self.suffix_counts[n_remaining_hits - 1]
+            landing_predecessors = self.predecessors[n_remaining_hits - 1]
+            for cell, shots in self.successors[n_remaining_hits].items():
+                if cell not in self.suffix_counts[n_remaining_hits]:
+                    continue
+                i, j = divmod(cell, width)
+                box_cell = (i - top) * box_width + j - left
+                for landing, direction_code in shots:
+                    if landing not in landing_suffix_counts:
+                        continue
+                    di, dj = vectors[direction_code]
+                    step, box_step = di * width + dj, di * box_width + dj
+                    shot_moves = array("I", [(cell + step * k) * 4 + direction_code for k in range(n_remaining_hits)])
+                    pattern = patterns.get((abs(box_step), n_remaining_hits))
+                    if pattern is None:
+                        pattern = sum(1 << (abs(box_step) * k) for k in range(n_remaining_hits))
+                        patterns[abs(box_step), n_remaining_hits] = pattern
+                    shot_mask = pattern << (box_cell + box_step if box_step > 0 else box_cell + box_step * n_remaining_hits)
+                    landing_predecessors.setdefault(landing, []).append((cell, shot_moves, shot_mask))
+        return self
+
+    """
+    Compute allowed paths to holes for the ball backward from the holes, sorted in the order of the forward search.
+    """
+    def find_paths(self, paths):
+        paths.extend(sorted(self.iter_paths(), key=lambda path: bytes(packed_move & 3 for packed_move in path.packed_moves)))
+        return paths
+
+    """
+    Generate allowed paths to holes for the ball using an iterative DFS algorithm backward from each hole: shots of
+    increasing length are undone until the start is met with all the hits of the ball. The explicit stack holds the
+    state (cell, remaining hits) and the index of the next predecessor shot to try at each depth.
+    """
+    def iter_paths(self):
+        n_hits = self.ball.n_remaining_hits
+        for n_end_hits, holes in enumerate(self.holes):
+            for hole in holes:
+                self.n_nodes += 1
+                frames = [[hole, n_end_hits, 0]]
+                # Undone shots as (packed moves, shot mask), the last one being the first shot.
+                shots = []
+                visited_mask = 0
+                while frames:
+                    frame = frames[-1]
+                    cell, n_remaining_hits, predecessor_index = frame
+                    predecessors = self.predecessors[n_remaining_hits].get(cell, ())
+
+                    # Failure: No shot leading to this state fits hence back-track.
+                    if predecessor_index == len(predecessors):
+                        frames.pop()
+                        if shots:
+                            visited_mask ^= shots.pop()[1]
+                        continue
+
+                    frame[2] = predecessor_index + 1
+                    departure, shot_moves, shot_mask = predecessors[predecessor_index]
+                    # Condition (4): the shot doesn't run over nor end on a position of the later shots.
+                    if shot_mask & visited_mask:
+                        continue
+
+                    self.n_nodes += 1
+                    shots.append((shot_moves, shot_mask))
+                    visited_mask |= shot_mask
+                    # Success: The start of the ball has been met with all its hits.
+                    if n_remaining_hits + 1 == n_hits:
+                        yield self.current_path(hole, shots)
+                        visited_mask ^= shots.pop()[1]
+                    else:
+                        frames.append([departure, n_remaining_hits + 1, 0])
+
+    """
+    Return the path made of the undone shots, replayed from the start.
+    """
+    def current_path(self, hole, shots):
+        packed_moves = array("I")
+        for shot_moves, shot_mask in reversed(shots):
+            packed_moves.extend(shot_moves)
+        mask = Path.cells_mask([packed_move >> 2 for packed_move in packed_moves] + [hole])
+        return Path((self.ball.i_init, self.ball.j_init), divmod(hole, COURSE.width), True, COURSE.hole_indexes[hole],
+                    packed_moves, mask)
+
+
+class AutoPathFinder:
+    # Expected number of holes within reach of a ball up to which the backward search is considered: the backward
+    # search starts from every hole it meets, so it only pays off when they are few.
+    MAX_HOLES_IN_REACH = 4
+
+    def __init__(self, ball, oracle=None, stats=None):
+        self.ball = ball
+        self.oracle = oracle
+        self.stats = stats
+        self.n_nodes = 0
+        # Set to the one of the chosen search.
+        self.counts_rejections = True
+
+    """
+    Compute allowed paths to holes for the ball in the direction of lowest estimated cost. The estimate is only worth
+    its exploration when few holes are expected within reach of the ball, i.e. in the square of the cells its hits can
+    span. Otherwise, the ball is searched forward right away.
+    """
+    def find_paths(self, paths):
+        n_hits = self.ball.n_remaining_hits
+        reach_side = n_hits * (n_hits + 1) + 1
+        reach_area = min(reach_side, COURSE.height) * min(reach_side, COURSE.width)
+        path_finder = PathFinder(self.ball, oracle=self.oracle, stats=self.stats)
+        if len(HOLES) * reach_area <= self.MAX_HOLES_IN_REACH * COURSE.width * COURSE.height:
+            backward_path_finder = BackwardPathFinder(self.ball, self.oracle).explore()
+            if backward_path_finder.backward_cost < backward_path_finder.forward_cost:
+                path_finder = backward_path_finder.build()
+        path_finder.find_paths(paths)
+        self.n_nodes = path_finder.n_nodes
+        self.counts_rejections = path_finder.counts_rejections
         return paths
 
 
+class ParallelPathFinder:
+    # Per worker process state, set up once by the pool initializer.
+    solver = None
+    transposition_table = None
+    oracle = None
+    search = None
+    collects_stats = False
+
+    def __init__(self, course, n_workers, transposition_table_capacity=None, oracle=None, search="forward", stats=None):
+        self.course = course
+        self.n_workers = n_workers
+        self.transposition_table_capacity = transposition_table_capacity
+        self.oracle = oracle
+        self.search = search
+        # Statistics of the parent process, where the counters of the workers are added up.
+        self.stats = stats
+
+    """
+    Set up a worker process: parse the course on its side so that no ball nor path has to be pickled. The oracle
+    tables built by the parent are reused.
+    """
+    @staticmethod
+    def init_worker(course, transposition_table_capacity, reachable, search, collects_stats):
+        ParallelPathFinder.solver = Solver(course)
+        ParallelPathFinder.transposition_table = TranspositionTable(transposition_table_capacity) if transposition_table_capacity else None
+        ParallelPathFinder.oracle = ReachabilityOracle.from_tables(COURSE, reachable)
+        ParallelPathFinder.search = search
+        ParallelPathFinder.collects_stats = collects_stats
+
+    """
+    Return the encoded paths of a ball, the number of DFS nodes expanded to find them and, when statistics are
+    collected and the search counts them, the is_hittable rejections by condition (None otherwise).
+    """
+    @staticmethod
+    def find_encoded_paths(ball_index):
+        ball = ParallelPathFinder.solver.balls[ball_index]
+        stats = SearchStats() if ParallelPathFinder.collects_stats else None
+        path_finder = Solver.choose_path_finder(ball, ParallelPathFinder.search, ParallelPathFinder.transposition_table,
+                                                ParallelPathFinder.oracle, stats)
+        paths = path_finder.find_paths([])
+        rejections = stats.rejections if stats is not None and path_finder.counts_rejections else None
+        return [path.encode() for path in paths], path_finder.n_nodes, rejections
+
+    """
+    Compute allowed paths to holes for each ball, spreading the balls over a process pool, and record the counters of
+    the workers in the statistics if any. Return the number of DFS nodes expanded per ball.
+    """
+    def find_paths(self, balls):
+        n_nodes = []
+        with ProcessPoolExecutor(self.n_workers, initializer=self.init_worker,
+                                 initargs=(self.course.copy(), self.transposition_table_capacity, self.oracle.reachable,
+                                           self.search, self.stats is not None)) as executor:
+            for ball, (encoded_paths, n_ball_nodes, rejections) in zip(balls, executor.map(self.find_encoded_paths,
+                                                                                           range(len(balls)))):
+                ball.paths = [Path.decode((ball.i_init, ball.j_init), encoded_path) for encoded_path in encoded_paths]
+                n_nodes.append(n_ball_nodes)
+                if self.stats is not None:
+                    if rejections is not None:
+                        self.stats.add_rejections(rejections)
+                    self.stats.record_ball(ball, n_ball_nodes, rejections is not None)
+        return n_nodes
+
+
+class HoleMatching:
+    def __init__(self, ball_holes, n_holes):
+        # Candidate hole indexes of each ball, i.e. the bipartite graph edges.
+        self.ball_holes = ball_holes
+        self.n_holes = n_holes
+        self.matched_holes = [None] * len(ball_holes)
+        self.matched_balls = [None] * n_holes
+
+    @staticmethod
+    def from_balls(balls, n_holes):
+        return HoleMatching([sorted({ball_path.hole_index for ball_path in ball.paths}) for ball in balls], n_holes)
+
+    """
+    Compute a maximum ball to hole matching with the Hopcroft-Karp algorithm. Return its size.
+    """
+    def maximize(self):
+        n_balls = len(self.ball_holes)
+        while True:
+            # Layer the balls by alternating path length from the free balls.
+            distances = [None] * n_balls
+            queue = deque(ball for ball in range(n_balls) if self.matched_holes[ball] is None)
+            for ball in queue:
+                distances[ball] = 0
+            is_augmentable = False
+            while queue:
+                ball = queue.popleft()
+                for hole in self.ball_holes[ball]:
+                    other_ball = self.matched_balls[hole]
+                    if other_ball is None:
+                        is_augmentable = True
+                    elif distances[other_ball] is None:
+                        distances[other_ball] = distances[ball] + 1
+                        queue.append(other_ball)
+            if not is_augmentable:
+                break
+
+            for ball in range(n_balls):
+                if self.matched_holes[ball] is None:
+                    self.augment(ball, distances)
+
+        return sum(hole is not None for hole in self.matched_holes)
+
+    """
+    Look for an augmenting path from a free ball along the layers using an iterative DFS algorithm, and flip the
+    matching along it. The explicit stack holds each ball of the path with the iterator over its candidate holes.
+    """
+    def augment(self, ball, distances):
+        stack = [(ball, iter(self.ball_holes[ball]))]
+        # Hole leading to each ball of the stack after the first one, then to a free hole.
+        path_holes = []
+        while stack:
+            ball, holes = stack[-1]
+            for hole in holes:
+                other_ball = self.matched_balls[hole]
+                if other_ball is None:
+                    path_holes.append(hole)
+                    for (path_ball, path_ball_holes), path_hole in zip(stack, path_holes):
+                        self.matched_holes[path_ball] = path_hole
+                        self.matched_balls[path_hole] = path_ball
+                    return True
+                if distances[other_ball] == distances[ball] + 1:
+                    path_holes.append(hole)
+                    stack.append((other_ball, iter(self.ball_holes[other_ball])))
+                    break
+            else:
+                distances[ball] = None
+                stack.pop()
+                if path_holes:
+                    path_holes.pop()
+        return False
+
+    """
+    Return the strongly connected component of every node of the alternating graph: balls point to their unmatched
+    candidate holes and holes to their matched ball. Balls are nodes 0 to n_balls - 1, holes are the next ones.
+    """
+    def strongly_connected_components(self):
+        n_balls = len(self.ball_holes)
+
+        def successors(node):
+            if node < n_balls:
+                return [n_balls + hole for hole in self.ball_holes[node] if hole != self.matched_holes[node]]
+            matched_ball = self.matched_balls[node - n_balls]
+            return [] if matched_ball is None else [matched_ball]
+
+        # Iterative Tarjan algorithm.
+        n_nodes = n_balls + self.n_holes
+        indexes, lowlinks, is_on_stack = [None] * n_nodes, [0] * n_nodes, [False] * n_nodes
+        components, stack = [None] * n_nodes, []
+        n_indexes, n_components = 0, 0
+        for root in range(n_nodes):
+            if indexes[root] is not None:
+                continue
+            indexes[root] = lowlinks[root] = n_indexes
+            n_indexes += 1
+            stack.append(root)
+            is_on_stack[root] = True
+            work = [(root, iter(successors(root)))]
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if indexes[child] is None:
+                        indexes[child] = lowlinks[child] = n_indexes
+                        n_indexes += 1
+                        stack.append(child)
+                        is_on_stack[child] = True
+                        work.append((child, iter(successors(child))))
+                        break
+                    elif is_on_stack[child]:
+                        lowlinks[node] = min(lowlinks[node], indexes[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+                    if lowlinks[node] == indexes[node]:
+                        while True:
+                            component_node = stack.pop()
+                            is_on_stack[component_node] = False
+                            components[component_node] = n_components
+                            if component_node == node:
+                                break
+                        n_components += 1
+        return components
+
+    """
+    Return, for each ball, its candidate holes used by at least one matching covering every ball. The maximum matching
+    must cover every ball. A hole is usable by a ball if it is its matched hole, if both lie on an alternating cycle
+    (same strongly connected component) or if the hole leads to a free hole along an alternating path.
+    """
+    def usable_holes(self):
+        n_balls = len(self.ball_holes)
+        hole_balls = [[] for hole in range(self.n_holes)]
+        for ball, holes in enumerate(self.ball_holes):
+            for hole in holes:
+                if hole != self.matched_holes[ball]:
+                    hole_balls[hole].append(ball)
+
+        leads_to_free_hole = [matched_ball is None for matched_ball in self.matched_balls]
+        queue = deque(hole for hole in range(self.n_holes) if leads_to_free_hole[hole])
+        while queue:
+            hole = queue.popleft()
+            for ball in hole_balls[hole]:
+                matched_hole = self.matched_holes[ball]
+                if not leads_to_free_hole[matched_hole]:
+                    leads_to_free_hole[matched_hole] = True
+                    queue.append(matched_hole)
+
+        components = self.strongly_connected_components()
+        return [[hole for hole in holes if hole == self.matched_holes[ball] or leads_to_free_hole[hole] or
+                 components[ball] == components[n_balls + hole]]
+                for ball, holes in enumerate(self.ball_holes)]
+
+    """
+    Repair a ball to hole matching after the candidate holes of the balls shrank: keep the still valid pairs and look
+    for an augmenting path for every other ball. Return the repaired matching or None if a ball can't be matched.
+    """
+    @staticmethod
+    def repair(ball_holes, matching):
+        hole_balls, unmatched_balls = {}, []
+        for ball, holes in ball_holes.items():
+            hole = matching.get(ball)
+            if hole in holes:
+                hole_balls[hole] = ball
+            else:
+                unmatched_balls.append(ball)
+
+        for ball in unmatched_balls:
+            if not HoleMatching.augment_from(ball, ball_holes, hole_balls, set()):
+                return None
+        return {ball: hole for hole, ball in hole_balls.items()}
+
+    """
+    Look for an augmenting path from a ball using an iterative DFS algorithm, and flip the matching along it. The
+    explicit stack holds each ball of the path with the iterator over its candidate holes.
+    """
+    @staticmethod
+    def augment_from(ball, ball_holes, hole_balls, visited_holes):
+        stack = [(ball, iter(ball_holes[ball]))]
+        # Hole leading to each ball of the stack after the first one, then to a free hole.
+        path_holes = []
+        while stack:
+            ball, holes = stack[-1]
+            for hole in holes:
+                if hole in visited_holes:
+                    continue
+                visited_holes.add(hole)
+                path_holes.append(hole)
+                if hole not in hole_balls:
+                    for (path_ball, path_ball_holes), path_hole in zip(stack, path_holes):
+                        hole_balls[path_hole] = path_ball
+                    return True
+                stack.append((hole_balls[hole], iter(ball_holes[hole_balls[hole]])))
+                break
+            else:
+                stack.pop()
+                if path_holes:
+                    path_holes.pop()
+        return False
+
+
 class PathResolver:
-    def __init__(self, balls):
+    def __init__(self, balls, stop_event=None, use_matching=False, deadline=None):
         self.balls = balls
+        # Event set by another process to abort the search.
+        self.stop_event = stop_event
+        # Whether a ball to hole matching is kept up to date to prune branches where one can't cover every ball.
+        self.use_matching = use_matching
+        # The search is aborted once the deadline is reached, keeping the longest assignment of paths found so far.
+        self.deadline = deadline
+        self.best_paths = []
+        self.n_nodes = 0
+        self.n_backtracks = 0
+
+    """
+    Return the candidate paths of the other balls compatible with a ball path, or None if one of them runs out.
+    """
+    @staticmethod
+    def forward_check(candidates, ball, ball_path):
+        remaining_candidates = {}
+        for other_ball, other_ball_paths in candidates.items():
+            if other_ball is ball:
+                continue
+            compatible_paths = [other_ball_path for other_ball_path in other_ball_paths if not other_ball_path.mask & ball_path.mask]
+            if not compatible_paths:
+                return None
+            remaining_candidates[other_ball] = compatible_paths
+        return remaining_candidates
+
+    """
+    Return the ball with the fewest remaining compatible paths.
+    """
+    @staticmethod
+    def most_constrained_ball(candidates):
+        return min(candidates, key=lambda candidate_ball: len(candidates[candidate_ball]))
+
+    """
+    Return the ball to hole matching repaired for the remaining candidates, or None if there's none anymore.
+    """
+    @staticmethod
+    def repair_matching(candidates, matching):
+        ball_holes = {ball: {ball_path.hole_index for ball_path in ball_paths} for ball, ball_paths in candidates.items()}
+        return HoleMatching.repair(ball_holes, matching)
 
     """
-    Compute ball's unique path to avoid paths cross and cover all holes using a DFS algorithm.
+    Compute ball's unique path to avoid paths cross and cover all holes using an iterative DFS algorithm.
+    The most constrained ball (fewest remaining compatible paths) is branched on first, and after each choice the
+    candidate paths of every other ball are filtered (forward checking) to back-track as soon as one runs out, or as
+    soon as the remaining balls can't be matched to distinct holes when the matching is used.
+    The explicit stack holds one frame (candidates, matching, branched ball, index of its next path) per assigned ball
+    and is preallocated to the number of balls.
+    """
+    def resolve_paths(self, paths, is_found, candidates=None, matching=None):
+        self.n_nodes += 1
+        if candidates is None:
+            candidates = {ball: ball.paths for ball in self.balls}
+            if self.use_matching:
+                matching = self.repair_matching(candidates, {})
+                if matching is None:
+                    return is_found
+
+        # Success: The unique solution has been found!
+        if not candidates:
+            return True
+
+        frames = [None] * (len(candidates) + 1)
+        frames[0] = [candidates, matching, self.most_constrained_ball(candidates), 0]
+        depth = 0
+        while depth >= 0:
+            # Abort: Another search did find the solution.
+            if self.stop_event is not None and self.stop_event.is_set():
+                return is_found
+
+            # Abort: Time is up. The clock is read at every node since a node forward checks every ball.
+            if self.deadline is not None and self.deadline.has_passed():
+                return is_found
+
+            frame = frames[depth]
+            candidates, matching, ball, path_index = frame
+            ball_paths = candidates[ball]
+
+            # Failure: Paths list do not provide a solution hence back-track.
+            if path_index == len(ball_paths):
+                depth -= 1
+                if depth >= 0:
+                    paths.pop()
+                    self.n_backtracks += 1
+                continue
+
+            frame[3] = path_index + 1
+            ball_path = ball_paths[path_index]
+            remaining_candidates = self.forward_check(candidates, ball, ball_path)
+            if remaining_candidates is None:
+                continue
+            remaining_matching = None
+            if self.use_matching:
+                remaining_matching = self.repair_matching(remaining_candidates, matching)
+                if remaining_matching is None:
+                    continue
+
+            paths.append(ball_path)
+            self.n_nodes += 1
+            # Success: The unique solution has been found!
+            if not remaining_candidates:
+                return True
+            if self.deadline is not None and len(paths) > len(self.best_paths):
+                self.best_paths = list(paths)
+
+            depth += 1
+            frames[depth] = [remaining_candidates, remaining_matching, self.most_constrained_ball(remaining_candidates), 0]
+
+        return is_found
+
+
+class SolutionCounter:
+    def __init__(self, balls, cap=None, timeout=None):
+        self.balls = balls
+        # Counting stops once cap solutions are found or timeout seconds have elapsed.
+        self.cap = cap
+        self.timeout = timeout
+        self.deadline = None
+        self.n_solutions = 0
+        self.is_complete = True
+        self.n_nodes = 0
+        self.n_backtracks = 0
+
+    """
+    Return the board status: unsolvable, unique, ambiguous or unknown (counting stopped before a second solution).
+    """
+    @property
+    def status(self):
+        if self.n_solutions > 1:
+            return "ambiguous"
+        if not self.is_complete:
+            return "unknown"
+        return "unique" if self.n_solutions else "unsolvable"
+
+    """
+    Count the ball path assignments that avoid paths cross and cover all holes, with the same most constrained ball
+    ordering and forward checking as PathResolver. Multiplicity is the number of arrow grids of the chosen paths, as
+    equivalent paths are left out of the candidates.
+    The explicit stack holds one frame (candidates, branched ball, index of its next path, multiplicity, number of
+    solutions before the current child) per assigned ball and is preallocated to the number of balls. A back-track is
+    counted when a child found no solution.
+    """
+    def count_solutions(self, candidates=None, multiplicity=1):
+        if candidates is None:
+            candidates = {ball: ball.paths for ball in self.balls}
+            self.deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        self.n_nodes += 1
+
+        # Success: One solution has been found.
+        if not candidates:
+            self.add_solutions(multiplicity)
+            return self.n_solutions
+
+        frames = [None] * (len(candidates) + 1)
+        frames[0] = [candidates, PathResolver.most_constrained_ball(candidates), 0, multiplicity, None]
+        depth = 0
+        while depth >= 0:
+            # Abort: Time is up.
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                self.is_complete = False
+                break
+
+            frame = frames[depth]
+            candidates, ball, path_index, multiplicity, n_previous_solutions = frame
+            if n_previous_solutions is not None:
+                if self.n_solutions == n_previous_solutions:
+                    self.n_backtracks += 1
+                frame[4] = None
+
+            # Failure: Paths list do not provide any more solution hence back-track.
+            ball_paths = candidates[ball]
+            if path_index == len(ball_paths):
+                depth -= 1
+                continue
+
+            frame[2] = path_index + 1
+            ball_path = ball_paths[path_index]
+            remaining_candidates = PathResolver.forward_check(candidates, ball, ball_path)
+            if remaining_candidates is None:
+                continue
+
+            self.n_nodes += 1
+            path_multiplicity = multiplicity * (1 + len(ball_path.equivalents))
+            # Success: One or more solutions have been found.
+            if not remaining_candidates:
+                self.add_solutions(path_multiplicity)
+                if not self.is_complete:
+                    break
+                continue
+
+            frame[4] = self.n_solutions
+            depth += 1
+            frames[depth] = [remaining_candidates, PathResolver.most_constrained_ball(remaining_candidates), 0,
+                             path_multiplicity, None]
+
+        return self.n_solutions
+
+    """
+    Count the solutions of a complete assignment, stopping the count once the cap is reached.
+    """
+    def add_solutions(self, multiplicity):
+        self.n_solutions += multiplicity
+        if self.cap is not None and self.n_solutions >= self.cap:
+            self.is_complete = False
+
+
+class PoolResolver:
+    # Per worker process state, set up once by the pool initializer.
+    solver = None
+    stop_event = None
+
+    """
+    Return the encoded paths of every ball, to be sent to the worker processes.
+    """
+    @staticmethod
+    def encode_paths(balls):
+        return [[path.encode() for path in ball.paths] for ball in balls]
+
+    """
+    Set up a worker process: parse the course and decode the ball paths on its side.
+    """
+    @staticmethod
+    def init_worker(course, encoded_paths, stop_event=None):
+        PoolResolver.solver = Solver(course)
+        PoolResolver.stop_event = stop_event
+        for ball, ball_encoded_paths in zip(PoolResolver.solver.balls, encoded_paths):
+            ball.paths = [Path.decode((ball.i_init, ball.j_init), encoded_path) for encoded_path in ball_encoded_paths]
+
+    """
+    Return the (ball index, path index) choices of a list of ball paths, cheap to send back to the parent process.
+    """
+    @staticmethod
+    def encode_choices(balls, paths):
+        ball_indexes = {(ball.i_init, ball.j_init): ball_index for ball_index, ball in enumerate(balls)}
+        choices = []
+        for path in paths:
+            ball_index = ball_indexes[path.start]
+            choices.append((ball_index, balls[ball_index].paths.index(path)))
+        return choices
+
+    @staticmethod
+    def decode_choices(balls, choices):
+        return [balls[ball_index].paths[path_index] for ball_index, path_index in choices]
+
+
+class ParallelPathResolver(PoolResolver):
+    def __init__(self, balls, n_workers, split_depth=1, resolver="dfs"):
+        self.balls = balls
+        self.n_workers = n_workers
+        self.split_depth = split_depth
+        # Resolver backend run by the workers on their subtrees.
+        self.resolver = resolver
+        self.n_nodes = 0
+        self.n_backtracks = 0
+
+    """
+    Resolve the subtree below a prefix of (ball index, path index) choices with a resolver backend. Return the full
+    list of choices of the solution, or None if the subtree has none (or the search was aborted), and the number of
+    resolver nodes and backtracks.
+    The backend is run on the remaining balls, their paths temporarily narrowed to the ones compatible with the prefix.
+    """
+    @staticmethod
+    def resolve_subtree(prefix, resolver):
+        balls = PoolResolver.solver.balls
+        candidates = {ball: ball.paths for ball in balls}
+        for ball_index, path_index in prefix:
+            ball = balls[ball_index]
+            candidates = PathResolver.forward_check(candidates, ball, ball.paths[path_index])
+
+        paths = PoolResolver.decode_choices(balls, prefix)
+        remaining_balls = list(candidates)
+        all_ball_paths = [ball.paths for ball in remaining_balls]
+        for ball in remaining_balls:
+            ball.paths = candidates[ball]
+        path_resolver = RESOLVERS[resolver](remaining_balls, PoolResolver.stop_event)
+        is_solved = path_resolver.resolve_paths(paths, False)
+        for ball, ball_paths in zip(remaining_balls, all_ball_paths):
+            ball.paths = ball_paths
+
+        if not is_solved:
+            return None, path_resolver.n_nodes, path_resolver.n_backtracks
+        return PoolResolver.encode_choices(balls, paths), path_resolver.n_nodes, path_resolver.n_backtracks
+
+    """
+    Split the search tree on the first levels of ball choices, as the sequential resolver would branch.
+    """
+    def split(self, candidates, prefix, depth, prefixes):
+        if not depth or not candidates:
+            prefixes.append(prefix)
+            return
+
+        ball_indexes = {ball: ball_index for ball_index, ball in enumerate(self.balls)}
+        ball = PathResolver.most_constrained_ball(candidates)
+        for ball_path in candidates[ball]:
+            remaining_candidates = PathResolver.forward_check(candidates, ball, ball_path)
+            if remaining_candidates is not None:
+                choice = (ball_indexes[ball], ball.paths.index(ball_path))
+                self.split(remaining_candidates, prefix + [choice], depth - 1, prefixes)
+
+    """
+    Compute ball's unique path by resolving the subtrees of the first levels of ball choices over a process pool.
+    All workers are cancelled as soon as one of them finds the solution.
+    """
+    def resolve_paths(self, paths, is_found):
+        prefixes = []
+        self.split({ball: ball.paths for ball in self.balls}, [], self.split_depth, prefixes)
+
+        stop_event = Event()
+        with ProcessPoolExecutor(self.n_workers, initializer=self.init_worker,
+                                 initargs=(COURSE.copy(), self.encode_paths(self.balls), stop_event)) as executor:
+            pending = {executor.submit(self.resolve_subtree, prefix, self.resolver) for prefix in prefixes}
+            while pending and not is_found:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    choices, n_nodes, n_backtracks = future.result()
+                    self.n_nodes += n_nodes
+                    self.n_backtracks += n_backtracks
+                    if choices is not None and not is_found:
+                        paths.extend(self.decode_choices(self.balls, choices))
+                        is_found = True
+
+            # Cancel queued subtrees and abort running ones.
+            stop_event.set()
+            for future in pending:
+                future.cancel()
+
+        return is_found
+
+
+class LazyPaths:
+    def __init__(self, paths_iterator):
+        self.paths_iterator = paths_iterator
+        # Paths pulled from the iterator so far.
+        self.paths = []
+        self.is_exhausted = False
+
+    """
+    Pull the next path from the iterator and cache it. Return None once the iterator is exhausted.
+    """
+    def pull(self):
+        if self.is_exhausted:
+            return None
+        path = next(self.paths_iterator, None)
+        if path is None:
+            self.is_exhausted = True
+            return None
+        self.paths.append(path)
+        return path
+
+    """
+    Iterate over the cached paths first, then pull the next ones from the iterator on demand.
+    """
+    def __iter__(self):
+        k = 0
+        while True:
+            if k == len(self.paths) and self.pull() is None:
+                return
+            yield self.paths[k]
+            k += 1
+
+    """
+    Return the number of cached paths not crossing the occupied cells. Paths are pulled until there are two of them, so
+    that a count of 1 or less is final.
+    """
+    def count_compatible(self, occupied):
+        n_compatible_paths = sum(not path.mask & occupied for path in self.paths)
+        while n_compatible_paths < 2:
+            path = self.pull()
+            if path is None:
+                break
+            n_compatible_paths += not path.mask & occupied
+        return n_compatible_paths
+
+
+class LazyPathResolver:
+    def __init__(self, balls, oracle=None, stats=None):
+        self.balls = balls
+        self.path_finders = [PathFinder(ball, oracle=oracle, stats=stats) for ball in balls]
+        self.lazy_paths = [LazyPaths(path_finder.iter_paths()) for path_finder in self.path_finders]
+        self.n_nodes = 0
+        self.n_backtracks = 0
+
+    """
+    Return the index of the unassigned ball with the fewest compatible paths, balls whose paths are all enumerated
+    coming first as their count is final, or None if a ball has no compatible path left.
+    """
+    def most_constrained_ball(self, unassigned_ball_indexes, occupied):
+        best_ball_index, best_key = None, None
+        for ball_index in unassigned_ball_indexes:
+            lazy_paths = self.lazy_paths[ball_index]
+            n_compatible_paths = lazy_paths.count_compatible(occupied)
+            if not n_compatible_paths:
+                return None
+            key = (n_compatible_paths, not lazy_paths.is_exhausted)
+            if best_key is None or key < best_key:
+                best_ball_index, best_key = ball_index, key
+        return best_ball_index
+
+    """
+    Compute ball's unique path to avoid paths cross and cover all holes using an iterative DFS algorithm. Ball paths
+    are only enumerated as far as the search needs them. The ball with the fewest compatible paths pulled so far is
+    branched on first, and after each choice every other ball must keep a compatible path (forward checking), pulling
+    more of its paths if needed.
+    The explicit stack holds one frame (ball index, iterator over its paths, occupied cells, unassigned ball indexes)
+    per assigned ball, occupied being the bitmask union of the cells of the already chosen paths.
     """
     def resolve_paths(self, paths, is_found):
+        self.n_nodes += 1
+
         # Success: The unique solution has been found!
-        if len(paths) == len(balls):
+        if not self.balls:
             return True
 
-        ball = balls[len(paths)]
-        for ball_path in ball.paths:
-            if all(ball_path.does_not_cross(path) for path in paths):
-                paths.append(ball_path)
-                is_found = self.resolve_paths(paths, is_found)
-                if not is_found:
+        ball_index = self.most_constrained_ball(range(len(self.balls)), 0)
+        if ball_index is None:
+            return is_found
+
+        frames = [None] * len(self.balls)
+        frames[0] = (ball_index, iter(self.lazy_paths[ball_index]), 0,
+                     [other_ball_index for other_ball_index in range(len(self.balls)) if other_ball_index != ball_index])
+        depth = 0
+        while depth >= 0:
+            ball_index, ball_paths, occupied, unassigned_ball_indexes = frames[depth]
+            ball_path = next(ball_paths, None)
+
+            # Failure: Paths list do not provide a solution hence back-track.
+            if ball_path is None:
+                depth -= 1
+                if depth >= 0:
                     paths.pop()
+                    self.n_backtracks += 1
+                continue
+
+            if ball_path.mask & occupied:
+                continue
+            remaining_occupied = occupied | ball_path.mask
+            next_ball_index = None
+            if unassigned_ball_indexes:
+                next_ball_index = self.most_constrained_ball(unassigned_ball_indexes, remaining_occupied)
+                if next_ball_index is None:
+                    continue
+
+            paths.append(ball_path)
+            self.n_nodes += 1
+            # Success: The unique solution has been found!
+            if next_ball_index is None:
+                return True
+
+            depth += 1
+            frames[depth] = (next_ball_index, iter(self.lazy_paths[next_ball_index]), remaining_occupied,
+                             [other_ball_index for other_ball_index in unassigned_ball_indexes
+                              if other_ball_index != next_ball_index])
+
+        return is_found
+
+
+class MatchingPathResolver(PathResolver):
+    def __init__(self, balls, stop_event=None):
+        super().__init__(balls, stop_event, use_matching=True)
+
+
+class DancingLinksResolver:
+    def __init__(self, balls, stop_event=None):
+        self.balls = balls
+        # Event set by another process to abort the search.
+        self.stop_event = stop_event
+        self.rows = []
+        # Node links and column of every node. Node 0 is the root, next nodes are the column headers.
+        self.left, self.right, self.up, self.down, self.column = [], [], [], [], []
+        self.sizes = []
+        self.n_nodes = 0
+        self.n_backtracks = 0
+
+    """
+    Build the exact cover matrix: one primary column per ball (exactly one path each), one secondary column per
+    cell (at most one path each) and one row per ball path.
+    """
+    def build(self):
+        cell_columns = {}
+        for ball in self.balls:
+            for ball_path in ball.paths:
+                for cell in ball_path.cells:
+                    cell_columns.setdefault(cell, len(self.balls) + len(cell_columns) + 1)
+
+        n_columns = len(self.balls) + len(cell_columns)
+        self.left = [column - 1 for column in range(n_columns + 1)]
+        self.right = [column + 1 for column in range(n_columns + 1)]
+        self.up = list(range(n_columns + 1))
+        self.down = list(range(n_columns + 1))
+        self.column = list(range(n_columns + 1))
+        self.sizes = [0] * (n_columns + 1)
+        self.rows = [None] * (n_columns + 1)
+
+        # Only the primary columns are linked to the root, secondary columns are linked to themselves.
+        self.left[0], self.right[len(self.balls)] = len(self.balls), 0
+        for column in cell_columns.values():
+            self.left[column] = self.right[column] = column
+
+        for ball_index, ball in enumerate(self.balls):
+            for ball_path in ball.paths:
+                columns = [ball_index + 1] + [cell_columns[cell] for cell in ball_path.cells]
+                first_node = len(self.column)
+                for k, column in enumerate(columns):
+                    node = first_node + k
+                    self.left.append(node - 1 if k else first_node + len(columns) - 1)
+                    self.right.append(node + 1 if k < len(columns) - 1 else first_node)
+                    self.up.append(self.up[column])
+                    self.down.append(column)
+                    self.column.append(column)
+                    self.rows.append(ball_path)
+                    self.down[self.up[column]] = node
+                    self.up[column] = node
+                    self.sizes[column] += 1
+
+    def cover(self, column):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[column]] = right[column]
+        left[right[column]] = left[column]
+        row_node = down[column]
+        while row_node != column:
+            node = right[row_node]
+            while node != row_node:
+                up[down[node]] = up[node]
+                down[up[node]] = down[node]
+                self.sizes[self.column[node]] -= 1
+                node = right[node]
+            row_node = down[row_node]
+
+    def uncover(self, column):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        row_node = up[column]
+        while row_node != column:
+            node = left[row_node]
+            while node != row_node:
+                self.sizes[self.column[node]] += 1
+                up[down[node]] = node
+                down[up[node]] = node
+                node = left[node]
+            row_node = up[row_node]
+        right[left[column]] = column
+        left[right[column]] = column
+
+    """
+    Return the primary column with the fewest remaining rows, i.e. the ball with the fewest remaining paths.
+    """
+    def smallest_column(self):
+        column, node = self.right[0], self.right[0]
+        while node != 0:
+            if self.sizes[node] < self.sizes[column]:
+                column = node
+            node = self.right[node]
+        return column
+
+    """
+    Compute ball's unique path to avoid paths cross and cover all holes using Knuth's Algorithm X on Dancing Links.
+    The search is an iterative DFS algorithm whose explicit stack holds one frame (covered column, chosen row node)
+    per chosen ball, the row node being the column header before the first row is tried.
+    """
+    def resolve_paths(self, paths, is_found):
+        if not self.rows:
+            self.build()
+        self.n_nodes += 1
+
+        # Success: Every ball column is covered.
+        if self.right[0] == 0:
+            return True
+
+        # Branch on the ball with the fewest remaining paths.
+        column = self.smallest_column()
+        self.cover(column)
+        frames = [[column, column]]
+        while frames:
+            # Abort: Another search did find the solution.
+            if self.stop_event is not None and self.stop_event.is_set():
+                return is_found
+
+            frame = frames[-1]
+            column, row_node = frame
+
+            # Back-track: The previously chosen row did not fit.
+            if row_node != column:
+                paths.pop()
+                self.n_backtracks += 1
+                node = self.left[row_node]
+                while node != row_node:
+                    self.uncover(self.column[node])
+                    node = self.left[node]
+
+            row_node = self.down[row_node]
+            # Failure: No path of the chosen ball fits hence back-track.
+            if row_node == column:
+                self.uncover(column)
+                frames.pop()
+                continue
+
+            frame[1] = row_node
+            paths.append(self.rows[row_node])
+            node = self.right[row_node]
+            while node != row_node:
+                self.cover(self.column[node])
+                node = self.right[node]
+            self.n_nodes += 1
+
+            # Success: Every ball column is covered.
+            if self.right[0] == 0:
+                return True
+
+            column = self.smallest_column()
+            self.cover(column)
+            frames.append([column, column])
 
-        # Failure: Paths list do not provide a solution hence back-track.
         return is_found
 
 
+class ClusterResolver(PoolResolver):
+    def __init__(self, balls, resolver="dfs", n_workers=None):
+        self.balls = balls
+        self.resolver = resolver
+        self.n_workers = n_workers
+        self.clusters = []
+        self.n_nodes = 0
+        self.n_backtracks = 0
+
+    """
+    Split the balls into clusters: connected components of the graph linking two balls when the cells of their paths
+    intersect. Balls of different clusters can't interact, so each cluster can be resolved on its own.
+    """
+    @staticmethod
+    def find_clusters(balls):
+        # Clusters as (bitmask union of the cells of their ball paths, balls).
+        clusters = []
+        for ball in balls:
+            mask = 0
+            for ball_path in ball.paths:
+                mask |= ball_path.mask
+            cluster_balls = [ball]
+            disjoint_clusters = []
+            for cluster_mask, other_balls in clusters:
+                if cluster_mask & mask:
+                    mask |= cluster_mask
+                    cluster_balls.extend(other_balls)
+                else:
+                    disjoint_clusters.append((cluster_mask, other_balls))
+            clusters = disjoint_clusters + [(mask, cluster_balls)]
+        # Balls are kept in input order inside a cluster.
+        ball_indexes = {ball: ball_index for ball_index, ball in enumerate(balls)}
+        return sorted((sorted(cluster_balls, key=ball_indexes.get) for mask, cluster_balls in clusters),
+                      key=lambda cluster_balls: ball_indexes[cluster_balls[0]])
+
+    """
+    Resolve the cluster of the given ball indexes with a resolver backend. Return the list of (ball index, path index)
+    choices of its solution, or None if it has none, and the number of resolver nodes and backtracks.
+    """
+    @staticmethod
+    def resolve_cluster(cluster_ball_indexes, resolver):
+        balls = PoolResolver.solver.balls
+        paths = []
+        path_resolver = RESOLVERS[resolver]([balls[ball_index] for ball_index in cluster_ball_indexes])
+        if not path_resolver.resolve_paths(paths, False):
+            return None, path_resolver.n_nodes, path_resolver.n_backtracks
+        return PoolResolver.encode_choices(balls, paths), path_resolver.n_nodes, path_resolver.n_backtracks
+
+    """
+    Compute ball's unique path by resolving each cluster of interacting balls separately, turning the product of their
+    search spaces into a sum. Clusters are spread over a process pool when a number of workers is given. The search
+    stops as soon as a cluster has no solution.
+    """
+    def resolve_paths(self, paths, is_found):
+        self.clusters = self.find_clusters(self.balls)
+        if not self.n_workers:
+            cluster_paths = []
+            for cluster_balls in self.clusters:
+                path_resolver = RESOLVERS[self.resolver](cluster_balls)
+                is_solved = path_resolver.resolve_paths(cluster_paths, False)
+                self.n_nodes += path_resolver.n_nodes
+                self.n_backtracks += path_resolver.n_backtracks
+                if not is_solved:
+                    return is_found
+            paths.extend(cluster_paths)
+            return True
+
+        ball_indexes = {ball: ball_index for ball_index, ball in enumerate(self.balls)}
+        cluster_choices = []
+        with ProcessPoolExecutor(self.n_workers, initializer=self.init_worker,
+                                 initargs=(COURSE.copy(), self.encode_paths(self.balls))) as executor:
+            pending = {executor.submit(self.resolve_cluster, [ball_indexes[ball] for ball in cluster_balls], self.resolver)
+                       for cluster_balls in self.clusters}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    choices, n_nodes, n_backtracks = future.result()
+                    self.n_nodes += n_nodes
+                    self.n_backtracks += n_backtracks
+                    if choices is None:
+                        # Failure: A cluster has no solution hence neither has the course.
+                        for pending_future in pending:
+                            pending_future.cancel()
+                        return is_found
+                    cluster_choices.extend(choices)
+
+        paths.extend(self.decode_choices(self.balls, sorted(cluster_choices)))
+        return True
+
+
 class SolutionPrinter:
     def __init__(self, paths):
         self.paths = paths
 
-    def print(self):
-        solution_course = [list(EmptyField.SYMBOL * COURSE.width) for i in range(COURSE.height)]
+    def render(self):
+        if numpy is not None:
+            return self.render_vectorized()
+
+        width, height = COURSE.width, COURSE.height
+        solution_course = bytearray(EmptyField.SYMBOL.encode() * (width * height))
+        # Moves are only unpacked here: cell * 4 + direction code.
+        symbols = [DIRECTION_SYMBOLS[direction] for direction in DIRECTIONS]
+        for path in self.paths:
+            for packed_move in path.packed_moves:
+                solution_course[packed_move >> 2] = symbols[packed_move & 3]
+
+        return Course.join_rows(solution_course, width, height)
+
+    """
+    Render with NumPy: the packed moves of all the paths are scattered at once into a grid of direction codes (one
+    more code standing for the empty field), mapped to symbols through a lookup table.
+    """
+    def render_vectorized(self):
+        width, height = COURSE.width, COURSE.height
+        packed_moves = array("I")
         for path in self.paths:
-            for move in path.moves:
-                solution_course[move.i][move.j] = str(move.direction)
+            packed_moves.extend(path.packed_moves)
+        packed_moves = numpy.frombuffer(packed_moves, numpy.uint32)
+
+        codes = numpy.full(width * height, len(DIRECTIONS), numpy.uint8)
+        codes[packed_moves >> 2] = packed_moves & 3
+        symbols = numpy.array([DIRECTION_SYMBOLS[direction] for direction in DIRECTIONS] +
+                              [ord(EmptyField.SYMBOL)], numpy.uint8)
+        return Course.join_rows(symbols[codes], width, height)
+
+    def print(self):
+        print(self.render())
+
+
+class SearchStats:
+    def __init__(self, profile_file_name=None):
+        self.ball_nodes = []
+        self.ball_paths = []
+        # Rejections of is_hittable by condition number, index 0 counting the accepted hits.
+        self.rejections = [0] * 7
+        # Number of balls searched without counting the rejections, i.e. searched backward.
+        self.n_uncounted_balls = 0
+        self.resolver_nodes = 0
+        self.resolver_backtracks = 0
+        self.phase_times = {}
+        # When given, every phase is profiled and the profile of the slowest one is dumped to this file.
+        self.profile_file_name = profile_file_name
+        self.slowest_phase_profile = None
+
+    """
+    Wrap a rejected_condition method of a ball to count rejections by condition.
+    """
+    def count_rejections(self, rejected_condition):
+        rejections = self.rejections
+
+        def counted_rejected_condition(direction):
+            condition = rejected_condition(direction)
+            rejections[condition] += 1
+            return condition
+
+        return counted_rejected_condition
+
+    """
+    Add the rejections counted by another process, e.g. a path finder worker.
+    """
+    def add_rejections(self, rejections):
+        for condition, n_rejections in enumerate(rejections):
+            self.rejections[condition] += n_rejections
+
+    def record_ball(self, ball, n_nodes, counts_rejections=True):
+        self.ball_nodes.append(n_nodes)
+        self.ball_paths.append(len(ball.paths))
+        if not counts_rejections:
+            self.n_uncounted_balls += 1
+
+    def record_resolver(self, resolver):
+        self.resolver_nodes += resolver.n_nodes
+        self.resolver_backtracks += resolver.n_backtracks
+
+    """
+    Run a phase of the pipeline, timing it (and profiling it when requested), and return its result.
+    """
+    def run_phase(self, name, function, *args):
+        profile = cProfile.Profile() if self.profile_file_name else None
+        start = time.perf_counter()
+        result = profile.runcall(function, *args) if profile else function(*args)
+        self.phase_times[name] = self.phase_times.get(name, 0) + time.perf_counter() - start
+        if profile and max(self.phase_times.values()) == self.phase_times[name]:
+            self.slowest_phase_profile = profile
+        return result
+
+    def report(self, file=sys.stderr):
+        for ball_index, (n_nodes, n_paths) in enumerate(zip(self.ball_nodes, self.ball_paths)):
+            print("ball {}: {} nodes, {} paths".format(ball_index, n_nodes, n_paths), file=file)
+        if self.ball_nodes and self.n_uncounted_balls == len(self.ball_nodes):
+            print("is_hittable: not collected (backward search)", file=file)
+        else:
+            print("is_hittable: {} accepted, rejected by condition {}{}".format(
+                self.rejections[0], ", ".join("({}) {}".format(condition, self.rejections[condition]) for condition in range(1, 7)),
+                " (not collected for {} balls searched backward)".format(self.n_uncounted_balls) if self.n_uncounted_balls else ""),
+                file=file)
+        print("resolver: {} nodes, {} backtracks".format(self.resolver_nodes, self.resolver_backtracks), file=file)
+        for name, phase_time in self.phase_times.items():
+            print("{}: {:.6f}s".format(name, phase_time), file=file)
+        if self.slowest_phase_profile is not None:
+            self.slowest_phase_profile.dump_stats(self.profile_file_name)
+            print("profile of the slowest phase dumped to {}".format(self.profile_file_name), file=file)
+
+
+class AnytimeResult:
+    def __init__(self, n_hits):
+        self.solution = []
+        self.is_solved = False
+        self.is_expired = False
+        # Maximum path depth of the last deepening iteration started.
+        self.max_depth = 0
+        # Per ball, its number of hits and the maximum path depth its paths were fully enumerated to (0 if none yet).
+        self.n_hits = n_hits
+        self.enumerated_depths = [0] * len(n_hits)
+        # Longest assignment of non crossing paths found by the resolver before the solution.
+        self.best_paths = []
+
+    """
+    Return the paths to print: the solution, or else the best partial assignment.
+    """
+    @property
+    def paths(self):
+        return self.solution if self.is_solved else self.best_paths
+
+    """
+    Return a list of ball indexes as comma separated ranges, e.g. "0-3, 7".
+    """
+    @staticmethod
+    def format_ranges(ball_indexes):
+        ranges = []
+        for ball_index in ball_indexes:
+            if ranges and ranges[-1][1] == ball_index - 1:
+                ranges[-1][1] = ball_index
+            else:
+                ranges.append([ball_index, ball_index])
+        return ", ".join(str(first) if first == last else "{}-{}".format(first, last) for first, last in ranges)
+
+    """
+    Print the progress: the number of balls whose paths were fully, partly or not yet enumerated, the indexes of the
+    incomplete ones, and the size of the best partial assignment.
+    """
+    def report(self, file=sys.stderr):
+        status = "solved" if self.is_solved else "deadline reached" if self.is_expired else "unsolvable"
+        partly_enumerated_balls = [ball_index for ball_index, (depth, n_hits) in enumerate(zip(self.enumerated_depths, self.n_hits))
+                                   if 0 < depth < n_hits]
+        not_enumerated_balls = [ball_index for ball_index, depth in enumerate(self.enumerated_depths) if not depth]
+        n_complete_balls = len(self.n_hits) - len(partly_enumerated_balls) - len(not_enumerated_balls)
+        print("{} at depth {}: {} balls fully enumerated, {} partly, {} not yet, best partial assignment of {}/{} balls"
+              .format(status, self.max_depth, n_complete_balls, len(partly_enumerated_balls), len(not_enumerated_balls),
+                      len(self.paths), len(self.n_hits)), file=file)
+        if partly_enumerated_balls:
+            print("partly enumerated balls: {}".format(self.format_ranges(partly_enumerated_balls)), file=file)
+        if not_enumerated_balls:
+            print("not yet enumerated balls: {}".format(self.format_ranges(not_enumerated_balls)), file=file)
+
+
+SEARCHES = ["forward", "backward", "auto"]
+
+RESOLVERS = {
+    "dfs": PathResolver,
+    "matching": MatchingPathResolver,
+    "dlx": DancingLinksResolver,
+}
+
+
+class Solver:
+    def __init__(self, course, stats=None):
+        global COURSE, HOLES, OBSTACLES, balls
+        COURSE, HOLES, OBSTACLES, balls = Parser.parse(course)
+        self.balls = balls
+        self.stats = stats
+        self.n_path_finder_nodes = 0
+        self.n_resolver_nodes = 0
+
+    def build_oracle(self, deadline=None):
+        return ReachabilityOracle(COURSE, max((ball.n_remaining_hits for ball in self.balls), default=0)).build(deadline)
+
+    """
+    Compute allowed paths to holes for each ball, pruning branches that can't reach any hole. Path suffixes are shared
+    between balls through a transposition table when a capacity is given. Balls are spread over a process pool when a
+    number of workers is given. Otherwise, paths are searched forward from the balls, backward from the holes, or in
+    the direction of lowest estimated cost for each ball (auto).
+    """
+    def find_paths(self, transposition_table_capacity=None, n_workers=None, search="forward"):
+        oracle = self.build_oracle()
+        if n_workers:
+            n_nodes = ParallelPathFinder(COURSE, n_workers, transposition_table_capacity, oracle, search,
+                                         self.stats).find_paths(self.balls)
+            self.n_path_finder_nodes += sum(n_nodes)
+            return
+
+        transposition_table = TranspositionTable(transposition_table_capacity) if transposition_table_capacity else None
+        for ball in self.balls:
+            path_finder = self.choose_path_finder(ball, search, transposition_table, oracle, self.stats)
+            ball.paths = path_finder.find_paths([])
+            self.n_path_finder_nodes += path_finder.n_nodes
+            if self.stats:
+                self.stats.record_ball(ball, path_finder.n_nodes, path_finder.counts_rejections)
+
+    """
+    Return the path finder of a ball for a search direction: forward, backward or the one of lowest estimated cost.
+    """
+    @staticmethod
+    def choose_path_finder(ball, search, transposition_table=None, oracle=None, stats=None):
+        if search == "backward":
+            return BackwardPathFinder(ball, oracle).build()
+        if search == "auto":
+            return AutoPathFinder(ball, oracle, stats)
+        return PathFinder(ball, transposition_table, oracle, stats)
+
+    """
+    Drop the ball paths to holes that no ball to hole matching covering every ball (of the given ones, all by default)
+    uses. Return False if there's no such matching, i.e. the course has no solution.
+    """
+    def narrow_paths(self, balls=None):
+        balls = self.balls if balls is None else balls
+        matching = HoleMatching.from_balls(balls, len(HOLES))
+        if matching.maximize() < len(balls):
+            return False
+        for ball, holes, usable_holes in zip(balls, matching.ball_holes, matching.usable_holes()):
+            if len(usable_holes) < len(holes):
+                usable_holes = set(usable_holes)
+                ball.paths = [ball_path for ball_path in ball.paths if ball_path.hole_index in usable_holes]
+        return True
+
+    """
+    Keep one representative path per (hole, cells) group of each ball: the paths of a group only differ by their
+    arrows hence are interchangeable for the resolvers. The other paths are kept as equivalents of the representative.
+    """
+    def reduce_paths(self):
+        for ball in self.balls:
+            representatives = {}
+            for ball_path in ball.paths:
+                representative = representatives.setdefault((ball_path.hole_index, ball_path.mask), ball_path)
+                if representative is not ball_path:
+                    representative.equivalents.append(ball_path)
+            ball.paths = list(representatives.values())
+
+    """
+    Compute unique solution with the given resolver backend, or with the parallel resolver when a number of workers
+    is given. Infeasible courses are rejected beforehand by a ball to hole matching. When decomposing, each cluster of
+    interacting balls is resolved separately with the resolver backend, clusters being spread over the workers.
+    """
+    def resolve_paths(self, resolver="dfs", n_workers=None, split_depth=1, decompose=False):
+        solution = []
+        self.reduce_paths()
+        if not self.narrow_paths():
+            return solution
+        if decompose:
+            path_resolver = ClusterResolver(self.balls, resolver, n_workers)
+        elif n_workers:
+            path_resolver = ParallelPathResolver(self.balls, n_workers, split_depth, resolver)
+        else:
+            path_resolver = RESOLVERS[resolver](self.balls)
+        path_resolver.resolve_paths(solution, False)
+        self.n_resolver_nodes += path_resolver.n_nodes
+        if self.stats:
+            self.stats.record_resolver(path_resolver)
+        return solution
+
+    """
+    Compute unique solution while enumerating the ball paths lazily. Ball paths are left to the ones pulled by the
+    search.
+    """
+    def resolve_paths_lazily(self):
+        solution = []
+        resolver = LazyPathResolver(self.balls, self.build_oracle(), self.stats)
+        resolver.resolve_paths(solution, False)
+        for ball, lazy_paths in zip(self.balls, resolver.lazy_paths):
+            ball.paths = lazy_paths.paths
+        self.n_path_finder_nodes += sum(path_finder.n_nodes for path_finder in resolver.path_finders)
+        self.n_resolver_nodes += resolver.n_nodes
+        if self.stats:
+            for ball, path_finder in zip(self.balls, resolver.path_finders):
+                self.stats.record_ball(ball, path_finder.n_nodes)
+            self.stats.record_resolver(resolver)
+        return solution
+
+    """
+    Return the balls the resolver can assign paths to at once: the balls having paths, narrowed down to the ones of a
+    maximum ball to hole matching when they can't all be matched to distinct holes.
+    """
+    def matchable_balls(self):
+        balls = [ball for ball in self.balls if ball.paths]
+        if self.narrow_paths(balls):
+            return balls
+        matching = HoleMatching.from_balls(balls, len(HOLES))
+        matching.maximize()
+        balls = [ball for ball, hole_index in zip(balls, matching.matched_holes) if hole_index is not None]
+        self.narrow_paths(balls)
+        return balls
+
+    """
+    Compute unique solution within timeout seconds by iterative deepening on the maximum path depth: ball paths are
+    enumerated up to 1 hit, then 2 hits and so on, the resolver running after each iteration. Balls whose paths were
+    all enumerated are not enumerated again. Until every ball has paths, the resolver assigns the ones that have, to
+    keep a partial assignment. When time is up, the search aborts and the result reports the progress.
+    """
+    def solve_anytime(self, timeout):
+        deadline = Deadline(timeout)
+        n_hits = [ball.n_remaining_hits for ball in self.balls]
+        result = AnytimeResult(n_hits)
+        oracle = self.build_oracle(deadline)
+        # Abort: Time is up before the oracle is complete.
+        if deadline.is_reached:
+            result.is_expired = True
+            return result
+        enumerated_paths = [[] for ball in self.balls]
+        for max_depth in range(1, max(n_hits, default=0) + 1):
+            result.max_depth = max_depth
+            for ball_index, ball in enumerate(self.balls):
+                if result.enumerated_depths[ball_index] == n_hits[ball_index]:
+                    continue
+                path_finder = PathFinder(ball, oracle=oracle, stats=self.stats, deadline=deadline, max_depth=max_depth)
+                ball_paths = path_finder.find_paths([])
+                self.n_path_finder_nodes += path_finder.n_nodes
+                # Abort: Time is up.
+                if not path_finder.is_complete:
+                    result.is_expired = True
+                    return result
+                enumerated_paths[ball_index] = ball_paths
+                result.enumerated_depths[ball_index] = min(max_depth, n_hits[ball_index])
+
+            # Paths are reduced and narrowed again from the enumerated ones at each iteration.
+            for ball, ball_paths in zip(self.balls, enumerated_paths):
+                for ball_path in ball_paths:
+                    ball_path.equivalents = []
+                ball.paths = list(ball_paths)
+            self.reduce_paths()
+            resolved_balls = self.matchable_balls()
+            # Abort: Time is up.
+            if deadline.has_passed():
+                result.is_expired = True
+                return result
+            resolved_paths = []
+            path_resolver = PathResolver(resolved_balls, deadline=deadline)
+            is_resolved = path_resolver.resolve_paths(resolved_paths, False)
+            self.n_resolver_nodes += path_resolver.n_nodes
+            if self.stats:
+                self.stats.record_resolver(path_resolver)
+            best_paths = resolved_paths if is_resolved else path_resolver.best_paths
+            if len(best_paths) > len(result.best_paths):
+                result.best_paths = best_paths
+            # Success: Every ball has been assigned a path.
+            if is_resolved and len(resolved_balls) == len(self.balls):
+                result.solution = resolved_paths
+                result.is_solved = True
+                return result
+            # Abort: Time is up.
+            if deadline.is_reached:
+                result.is_expired = True
+                return result
 
-        print("\n".join(["".join(row) for row in solution_course]))
+        return result
+
+    """
+    Count the solutions of the course, stopping at cap solutions or after timeout seconds.
+    """
+    def count_solutions(self, cap=None, timeout=None):
+        counter = SolutionCounter(self.balls, cap, timeout)
+        self.reduce_paths()
+        if self.narrow_paths():
+            counter.count_solutions()
+        self.n_resolver_nodes += counter.n_nodes
+        if self.stats:
+            self.stats.record_resolver(counter)
+        return counter
 
 
 if __name__ == "__main__":
-    COURSE, HOLES, OBSTACLES, balls = Parser.parse(Reader.read_input())
-    for ball in balls:
-        paths = PathFinder(ball).find_paths([])
-        # Compute allowed paths to holes for each ball.
-        ball.paths = paths
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--resolver", choices=RESOLVERS, default="dfs")
+    argument_parser.add_argument("--transposition-table", type=int, metavar="CAPACITY",
+                                 help="memoize path suffixes, keeping at most CAPACITY of them (the states practically never recur since "
+                                      "shots get strictly shorter, so this mostly adds overhead)")
+    argument_parser.add_argument("--workers", type=int, metavar="N", help="enumerate ball paths over N processes")
+    argument_parser.add_argument("--search", choices=SEARCHES, default="forward",
+                                 help="enumerate ball paths forward from the balls, backward from the holes or in the "
+                                      "direction of lowest estimated cost per ball")
+    argument_parser.add_argument("--resolver-workers", type=int, metavar="N",
+                                 help="resolve the subtrees of the first ball choices over N processes, each with the --resolver backend")
+    argument_parser.add_argument("--split-depth", type=int, default=1,
+                                 help="number of ball choice levels split between resolver workers")
+    argument_parser.add_argument("--clusters", action="store_true",
+                                 help="resolve independent clusters of balls separately (over the resolver workers if any)")
+    argument_parser.add_argument("--lazy", action="store_true",
+                                 help="enumerate ball paths on demand while resolving (other search options are ignored)")
+    argument_parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                                 help="deepen the path depth until solved or SECONDS elapsed, printing the best partial "
+                                      "assignment otherwise (other search options are ignored)")
+    argument_parser.add_argument("--count-solutions", action="store_true",
+                                 help="print the number of solutions and whether the board is ambiguous instead")
+    argument_parser.add_argument("--cap", type=int, help="stop counting solutions at CAP")
+    argument_parser.add_argument("--timeout", type=float, help="stop counting solutions after TIMEOUT seconds")
+    argument_parser.add_argument("--stats", action="store_true", help="report search statistics on standard error")
+    argument_parser.add_argument("--profile", metavar="FILE",
+                                 help="with --stats, dump the cProfile statistics of the slowest phase to FILE")
+    args = argument_parser.parse_args()
+
+    stats = SearchStats(args.profile) if args.stats else None
+    run_phase = stats.run_phase if stats else lambda name, function, *function_args: function(*function_args)
 
-    # Compute unique solution.
-    solution = []
-    PathResolver(balls).resolve_paths(solution, False)
+    solver = run_phase("parse", Solver, run_phase("read", Reader.read_input), stats)
+    if args.count_solutions:
+        run_phase("find_paths", solver.find_paths, args.transposition_table, args.workers, args.search)
+        counter = run_phase("count_solutions", solver.count_solutions, args.cap, args.timeout)
+        print("{}{} solution(s): {}".format(counter.n_solutions, "" if counter.is_complete else "+", counter.status))
+    elif args.deadline is not None:
+        result = run_phase("solve_anytime", solver.solve_anytime, args.deadline)
+        run_phase("print", SolutionPrinter(result.paths).print)
+        if not result.is_solved:
+            result.report()
+    else:
+        if args.lazy:
+            solution = run_phase("resolve_paths_lazily", solver.resolve_paths_lazily)
+        else:
+            run_phase("find_paths", solver.find_paths, args.transposition_table, args.workers, args.search)
+            solution = run_phase("resolve_paths", solver.resolve_paths, args.resolver, args.resolver_workers, args.split_depth,
+                                 args.clusters)
+        run_phase("print", SolutionPrinter(solution).print)
 
-    SolutionPrinter(solution).print()
+    if stats:
+        stats.report()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import sys
+import time
+
+import main
+
+
+class SolutionValidator:
+    # Arrow symbol bytes to (row, column) steps.
+    ARROWS = {main.DIRECTION_SYMBOLS[direction]: direction.value for direction in main.DIRECTIONS}
+
+    def __init__(self, course):
+        self.course, self.holes, self.obstacles, self.balls = main.Parser.parse(course)
+
+    """
+    Return the list of rule violations of an arrow grid (as printed by SolutionPrinter) for the course. The grid is
+    valid if the list is empty. Every ball is traced from its start along the arrows, each cell being visited once,
+    hence a linear time in the grid size.
+    """
+    def validate(self, solution_rows):
+        width, height, cells = self.course.width, self.course.height, self.course.cells
+        if len(solution_rows) != height or any(len(row) != width for row in solution_rows):
+            return ["solution grid is not {}x{}".format(width, height)]
+
+        grid = "".join(solution_rows).encode()
+        owners = [None] * (width * height)
+        errors = []
+        for ball_index, ball in enumerate(self.balls):
+            error = self.trace(ball_index, ball, grid, owners)
+            if error:
+                errors.append("ball {} at ({}, {}): {}".format(ball_index, ball.i_init, ball.j_init, error))
+
+        for hole in self.holes:
+            if owners[hole.i * width + hole.j] is None:
+                errors.append("hole at ({}, {}) is not covered".format(hole.i, hole.j))
+
+        for cell, symbol in enumerate(grid):
+            if symbol in self.ARROWS and owners[cell] is None:
+                errors.append("arrow at ({}, {}) belongs to no ball".format(*divmod(cell, width)))
+        return errors
+
+    """
+    Follow the arrows of a ball, claiming the cells it runs over. Return an error message or None.
+    """
+    def trace(self, ball_index, ball, grid, owners):
+        width, height, cells = self.course.width, self.course.height, self.course.cells
+        i, j = ball.i_init, ball.j_init
+        for n_remaining_hits in range(ball.n_remaining_hits, 0, -1):
+            cell = i * width + j
+            step = self.ARROWS.get(grid[cell])
+            if step is None:
+                return "stops at ({}, {}) out of a hole".format(i, j)
+
+            # The shot start and run over cells carry the shot arrow.
+            for k in range(n_remaining_hits):
+                run_over_i, run_over_j = i + step[0] * k, j + step[1] * k
+                if not (0 <= run_over_i < height and 0 <= run_over_j < width):
+                    return "leaves the course"
+                run_over_cell = run_over_i * width + run_over_j
+                if k and cells[run_over_cell] in (main.CellTypes.HOLE, main.CellTypes.BALL):
+                    return "runs over a hole or a ball at ({}, {})".format(run_over_i, run_over_j)
+                if grid[run_over_cell] != grid[cell]:
+                    return "shot of {} cut short at ({}, {})".format(n_remaining_hits, run_over_i, run_over_j)
+                if owners[run_over_cell] is not None:
+                    return "crosses a path at ({}, {})".format(run_over_i, run_over_j)
+                owners[run_over_cell] = ball_index
+
+            i, j = i + step[0] * n_remaining_hits, j + step[1] * n_remaining_hits
+            if not (0 <= i < height and 0 <= j < width):
+                return "leaves the course"
+            cell = i * width + j
+            if cells[cell] == main.CellTypes.OBSTACLE:
+                return "lands on an obstacle at ({}, {})".format(i, j)
+            if cells[cell] == main.CellTypes.BALL:
+                return "lands on a ball at ({}, {})".format(i, j)
+            if cells[cell] == main.CellTypes.HOLE:
+                if owners[cell] is not None:
+                    return "reaches the hole at ({}, {}) already taken".format(i, j)
+                if grid[cell] in self.ARROWS:
+                    return "goes on from the hole at ({}, {})".format(i, j)
+                owners[cell] = ball_index
+                return None
+
+        return "has no hit left at ({}, {}) out of a hole".format(i, j)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Validate solution arrow grids against their courses.")
+    argument_parser.add_argument("course", nargs="?", help="course file")
+    argument_parser.add_argument("solution", nargs="?", help="solution file (standard input by default)")
+    argument_parser.add_argument("--batch", metavar="REPORTS",
+                                 help="JSON lines with puzzle and solution fields, as written by batch.py")
+    args = argument_parser.parse_args()
+
+    if args.batch:
+        start, n_boards, n_invalid = time.perf_counter(), 0, 0
+        with open(args.batch) as reports:
+            for line in reports:
+                report = json.loads(line)
+                try:
+                    validator = SolutionValidator(main.Reader.read_file(report["puzzle"]))
+                except ValueError as error:
+                    errors = [str(error)]
+                else:
+                    errors = validator.validate(report["solution"] or [])
+                n_boards, n_invalid = n_boards + 1, n_invalid + bool(errors)
+                print(json.dumps({"puzzle": report["puzzle"], "valid": not errors, "errors": errors}))
+        elapsed = time.perf_counter() - start
+        print("{} boards, {} invalid, {:.0f} boards/s".format(n_boards, n_invalid, n_boards / elapsed if elapsed else 0),
+              file=sys.stderr)
+        sys.exit(1 if n_invalid else 0)
+
+    if not args.course:
+        argument_parser.error("a course file or --batch is required")
+    solution_file = open(args.solution) if args.solution else sys.stdin
+    errors = SolutionValidator(main.Reader.read_file(args.course)).validate(solution_file.read().splitlines())
+    for error in errors:
+        print(error)
+    print("invalid" if errors else "valid")
+    sys.exit(1 if errors else 0)